@@ -1,6 +1,8 @@
 import requests
+import threading
 import time
 import logging 
+from collections import deque
 
 class BaseApiService:
     """
@@ -8,7 +10,7 @@ class BaseApiService:
     Provides retry functionality, request execution, and error handling.
     """
 
-    def __init__(self, base_url, max_retries=3, retry_delay=2):
+    def __init__(self, base_url, max_retries=3, retry_delay=2, rate_limit_calls=None, rate_limit_period=60, http_session=None):
         """
         Initialize the BaseApiService.
 
@@ -20,14 +22,67 @@ class BaseApiService:
             Maximum number of retry attempts for failed API calls.
         retry_delay : int
             Delay (in seconds) between retries.
+        rate_limit_calls : int, optional
+            Maximum number of requests allowed per rate limit period. No limit if None.
+        rate_limit_period : int
+            Length (in seconds) of the rate limit window.
+        http_session : requests.Session, optional
+            HTTP session to send requests through. A new session is created if None.
         """
         self.base_url = base_url
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.rate_limit_calls = rate_limit_calls
+        self.rate_limit_period = rate_limit_period
+        self._request_times = deque()
+        self._rate_limit_lock = threading.Lock()
+        # Reuse connections (keep-alive) across requests to the same API
+        self.http_session = http_session or requests.Session()
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.debug(f"BaseApiService initialized with base_url={base_url}, max_retries={max_retries}, retry_delay={retry_delay}")
 
 
+    def prewarm(self, timeout=5):
+        """
+        Open a connection to the API host on a background thread, so the TCP and TLS
+        handshakes are done before the first real request. Failures are only logged.
+
+        Parameters
+        ----------
+        timeout : int
+            Seconds to wait for the host before giving up.
+        """
+        def connect():
+            try:
+                self.http_session.head(self.base_url, timeout=timeout)
+                self.logger.debug(f"Connection to {self.base_url} prewarmed")
+            except requests.RequestException as e:
+                self.logger.debug(f"Connection prewarm failed: {e}")
+
+        threading.Thread(target=connect, daemon=True).start()
+
+
+    def _wait_for_rate_limit(self):
+        """
+        Block until another request can be made without exceeding the rate limit.
+        """
+        if not self.rate_limit_calls:
+            return
+
+        with self._rate_limit_lock:
+            now = time.monotonic()
+            while self._request_times and now - self._request_times[0] >= self.rate_limit_period:
+                self._request_times.popleft()
+
+            if len(self._request_times) >= self.rate_limit_calls:
+                wait = self.rate_limit_period - (now - self._request_times[0])
+                self.logger.info(f"Rate limit of {self.rate_limit_calls} requests reached, waiting {wait:.1f}s")
+                time.sleep(wait)
+                self._request_times.popleft()
+
+            self._request_times.append(time.monotonic())
+
+
     def _make_request(self, endpoint="", params=None):
         """
         Execute an HTTP GET request with retry logic.
@@ -46,8 +101,10 @@ class BaseApiService:
 
         Raises
         ------
-        Exception
-            If all retry attempts fail or the response is invalid.
+        requests.RequestException
+            If all retry attempts fail.
+        ValueError
+            If the response is invalid.
         """
         self.logger.debug(f"Attempting to make request to {self.base_url}/{endpoint} with params {params}")
 
@@ -57,7 +114,8 @@ class BaseApiService:
         for attempt in range(1, self.max_retries + 1):
             try:
                 self.logger.info(f"Attempt {attempt}: Requesting {url} with params {params}")
-                response = requests.get(url, params=params)
+                self._wait_for_rate_limit()
+                response = self.http_session.get(url, params=params)
                 response.raise_for_status()
                 self.logger.debug(f"Request succeeded on attempt {attempt}, Response: {response}")
                 data = response.json()
@@ -73,7 +131,9 @@ class BaseApiService:
                 if attempt < self.max_retries:
                     time.sleep(self.retry_delay)
                 else:
-                    raise Exception(f"Failed to fetch data from {url} after {self.max_retries} attempts")
+                    raise requests.RequestException(
+                        f"Failed to fetch data from {url} after {self.max_retries} attempts"
+                    ) from e
             except requests.exceptions.HTTPError as e:
                 self.logger.error(f"HTTP error occurred: {e}")
                 raise
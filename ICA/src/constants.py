@@ -5,6 +5,13 @@ Defines constants used across the Weather Data Application. This module provides
 a single location for managing constants, ensuring consistency and reducing duplication.
 """
 
+from pathlib import Path
+from typing import Final
+
+# Database location, resolved once against the repository root so it doesn't depend on the
+# working directory, and given with forward slashes so the sqlite:/// URL parses the same everywhere
+DB_PATH = (Path(__file__).resolve().parents[2] / "db" / "CIS4044-N-SDI-OPENMETEO-PARTIAL.db").as_posix()
+
 # Date
 START_OF_YEAR = "-01-01"
 END_OF_YEAR = "-12-31"
@@ -28,20 +35,39 @@ MEAN_TEMP = "mean_temp"
 YEAR = "year"
 
 # Display choices
-DISPLAY_CONSOLE = 1
-DISPLAY_BAR_CHART = 2
-DISPLAY_PIE_CHART = 3
-DISPLAY_SCATTER_PLOT = 4
-DISPLAY_LINE_CHART = 5
-
-# Main menu options
-MENU_VIEW_COUNTRIES = 1
-MENU_VIEW_CITIES = 2
-MENU_AVG_TEMP = 3
-MENU_7DAY_PRECIP = 4
-MENU_MEAN_TEMP_CITY = 5
-MENU_ANNUAL_PRECIP_CITY = 6
-MENU_EXIT = 0
+DISPLAY_CONSOLE: Final[int] = 1
+DISPLAY_BAR_CHART: Final[int] = 2
+DISPLAY_PIE_CHART: Final[int] = 3
+DISPLAY_SCATTER_PLOT: Final[int] = 4
+DISPLAY_LINE_CHART: Final[int] = 5
+
+# Main menu options, compared against the user's integer choice and never reassigned
+MENU_VIEW_COUNTRIES: Final[int] = 1
+MENU_VIEW_CITIES: Final[int] = 2
+MENU_AVG_TEMP: Final[int] = 3
+MENU_7DAY_PRECIP: Final[int] = 4
+MENU_MEAN_TEMP_CITY: Final[int] = 5
+MENU_ANNUAL_PRECIP_CITY: Final[int] = 6
+MENU_EXIT: Final[int] = 0
+
+# Menu text, written to stdout in a single call per redraw
+MAIN_MENU_TEXT = "\n".join([
+    "",
+    "Weather Data Application",
+    "1. View all countries",
+    "2. View all cities",
+    "3. Get average annual temperature",
+    "4. Get seven-day precipitation",
+    "5. Get mean temperature by city",
+    "6. Get annual precipitation by country",
+    "0. Exit",
+]) + "\n"
+DISPLAY_MENU_TEXT = "\n".join([
+    "How would you like to display the data?",
+    "1. Console",
+    "2. Bar Chart",
+    "3. Pie Chart",
+]) + "\n"
 
 # Labels and Titles for Output
 TITLE_COUNTRIES = "Countries"
@@ -81,6 +107,21 @@ PRECIPITATION_SUM = "precipitation_sum"
 
 ID = "id"
 
+# Maximum number of cities / countries held in the LocationManager lookup caches
+LOCATION_CACHE_SIZE = 1024
+
+# Maximum number of query results held in the SQLiteQuery results cache
+QUERY_CACHE_SIZE = 128
+
+# Number of concurrent Geocoding API requests when resolving several locations at once
+GEOCODING_WORKERS = 8
+
+# Number of pooled HTTP connections kept open per host
+HTTP_POOL_SIZE = 8
+
+# Number of weather rows sent per executemany batch
+INSERT_BATCH_SIZE = 500
+
 MONTH_NAMES = [
         "January", "February", "March", "April", "May", "June", "July", "August", 
         "September", "October", "November", "December"
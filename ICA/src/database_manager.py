@@ -1,22 +1,28 @@
 import logging
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import SQLAlchemyError
 
 class DatabaseManager:
     """
     Manages database connection and session handling.
     """
 
-    def __init__(self, engine):
+    def __init__(self, engine, session_factory=None):
         """
-        Initialize the database manager with the provided database URL.
+        Initialize the database manager with the application's engine.
 
         Parameters
         ----------
-        db_url : str
-            The URL for the database connection.
+        engine : Engine
+            The engine for the database connection.
+        session_factory : sessionmaker, optional
+            The application's session factory, so sessions from this manager share its
+            configuration. A factory bound to the engine is created if None.
         """
         self.engine = engine
-        self.session = sessionmaker(bind=self.engine)
+        self.session = session_factory or sessionmaker(bind=self.engine)
+        self.logger = logging.getLogger(self.__class__.__name__)
 
 
     def get_session(self):
@@ -42,13 +48,24 @@ class DatabaseManager:
         """
         try:
             session.close()
-        except Exception as e:
-            print(f"Error closing session: {e}")
+        except Exception:
+            self.logger.exception("Error closing session")
+
+
+    def close_connection(self):
+        """
+        Close the engine's pooled connection, the single SQLite connection the
+        application shares.
+        """
+        self.logger.debug("Disposing database engine")
+        self.engine.dispose()
 
 
     def execute_query(self, query):
         """
-        Execute a raw SQL query.
+        Execute a raw SQL query on the application's shared connection. The session is
+        short-lived, but the engine's StaticPool hands it the same SQLite connection every
+        time, so no connection is opened or closed per query.
 
         Parameters
         ----------
@@ -63,15 +80,15 @@ class DatabaseManager:
         self.logger.debug(f"Executing query: {query}")
         session = self.get_session()
         try:
-            result = session.execute(query).fetchall()
+            result = session.execute(text(query)).fetchall()
             self.logger.debug(f"Query executed successfully, found {len(result)} rows.")
             return result
         except SQLAlchemyError as e:
             self.logger.error(f"SQL query failed: {e}")
             session.rollback()
             raise
-        except Exception as e:
-            print(f"Error executing query: {e}")
+        except Exception:
+            self.logger.exception("Error executing query")
             return []
         finally:
             self.close_session(session)
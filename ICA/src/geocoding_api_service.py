@@ -4,14 +4,22 @@ from sqlalchemy.exc import SQLAlchemyError
 from base_api_service import BaseApiService
 from session_manager import SessionManager
 from models import *
+from statements import STMT_COUNTRY_BY_NAME, STMT_INSERT_COUNTRY
 
 class GeocodingApiService(BaseApiService):
     """
     Service for interacting with the Open-Meteo Geocoding API.
     """
 
-    def __init__(self, session_manager: SessionManager, max_retries=3, retry_delay=2):
-        super().__init__(base_url="https://geocoding-api.open-meteo.com/v1/search", max_retries=max_retries, retry_delay=retry_delay)
+    def __init__(self, session_manager: SessionManager, max_retries=3, retry_delay=2, rate_limit_calls=50, rate_limit_period=60, http_session=None):
+        super().__init__(
+            base_url="https://geocoding-api.open-meteo.com/v1/search",
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            rate_limit_calls=rate_limit_calls,
+            rate_limit_period=rate_limit_period,
+            http_session=http_session
+        )
         self.session = session_manager.get_session()
 
 
@@ -31,41 +39,96 @@ class GeocodingApiService(BaseApiService):
             SQLAlchemyError: If there is a database-related error during the transaction.
             Exception: If any other unexpected error occurs.
         """
-        self.logger.debug(f"Fetching geocoding data for city: {city_name}")
+        data = self.search_city(city_name)
+
+        # Handle multiple city results
+        if len(data) > 1:
+            city_info = self.choose_city(city_name, data)
+        else:
+            city_info = data[0]
+
+        return [self.save_city(city_info)]
+
+
+    def choose_city(self, city_name, data):
+        """
+        Prompts the user to select one of several geocoding results for a city name.
+
+        Args:
+            city_name (str): The name of the city that was searched for.
+            data (list[dict]): The geocoding results to choose from.
+
+        Returns:
+            dict: The selected geocoding result.
+        """
+        # Build the whole list of options and print it in one call
+        lines = [f"Multiple locations found for '{city_name}':"]
+        for idx, city in enumerate(data):
+            # Use country or country_code
+            country_display = city.get('country', city.get('country_code', 'N/A'))
+            lines.append(f"{idx + 1}. {city['name']}, {country_display} (Lat: {city['latitude']}, Lon: {city['longitude']})")
+        print("\n".join(lines))
+
+        # Get user choice
         try:
-            # Fetch city data from the API
-            response = self._make_request(params={'name': city_name})
-            # self.logger.debug(f"API Response: {response}")
-            data = response.get("results", [])
+            choice = int(input(f"Please select a city (1-{len(data)}): ")) - 1
+            if choice < 0 or choice >= len(data):
+                raise ValueError("Invalid choice")
+        except ValueError as e:
+            self.logger.error(f"Invalid city choice: {e}")
+            print("Please enter a valid number.")
+            return self.choose_city(city_name, data)
+
+        return data[choice]
 
-            if response and response.get("results"):
-                self.logger.info(f"Found {len(response['results'])} results for {city_name}")
-            else:
-                self.logger.error(f"No results found for {city_name}")            
-                raise ValueError(f"No results found for city: {city_name}")
-
-            # Handle multiple city results
-            if len(data) > 1:
-                print(f"Multiple locations found for '{city_name}':")
-                for idx, city in enumerate(data):
-                    # Use country or country_code
-                    country_display = city.get('country', city.get('country_code', 'N/A'))
-                    print(f"{idx + 1}. {city['name']}, {country_display} (Lat: {city['latitude']}, Lon: {city['longitude']})")
-
-                # Get user choice
-                try:
-                    choice = int(input(f"Please select a city (1-{len(data)}): ")) - 1
-                    if choice < 0 or choice >= len(data):
-                        raise ValueError("Invalid choice")
-                except ValueError as e:
-                    self.logger.error(f"Invalid city choice: {e}")
-                    print("Please enter a valid number.")
-                    return self.fetch_city_data(city_name)
-                
-                city_info = data[choice]
-            else:
-                city_info = data[0]
 
+    def search_city(self, city_name):
+        """
+        Fetches the geocoding results for a city name from the Open-Meteo API without
+        touching the database, so it is safe to call from worker threads.
+
+        Args:
+            city_name (str): The name of the city to search for.
+
+        Returns:
+            list[dict]: The raw geocoding results for the city.
+
+        Raises:
+            ValueError: If no results are found for the given city name.
+        """
+        self.logger.debug(f"Fetching geocoding data for city: {city_name}")
+
+        # Fetch city data from the API
+        response = self._make_request(params={'name': city_name})
+        # self.logger.debug(f"API Response: {response}")
+        data = response.get("results", [])
+
+        if data:
+            self.logger.info(f"Found {len(data)} results for {city_name}")
+        else:
+            self.logger.error(f"No results found for {city_name}")            
+            raise ValueError(f"No results found for city: {city_name}")
+        return data
+
+
+    def save_city(self, city_info, commit=True):
+        """
+        Saves a geocoding result as a city (and its country, if not already stored) in the database.
+
+        Args:
+            city_info (dict): A single geocoding result.
+            commit (bool): Commit the new rows. If False they are only flushed,
+                leaving the commit to the caller's transaction.
+
+        Returns:
+            City: The `City` object added to the database.
+
+        Raises:
+            ValueError: If the geocoding result is missing required fields.
+            SQLAlchemyError: If there is a database-related error during the transaction.
+            Exception: If any other unexpected error occurs.
+        """
+        try:
             self.logger.debug(f"City selected: {city_info}")
             self.logger.debug(f"City keys: {city_info.keys()}")
 
@@ -76,29 +139,22 @@ class GeocodingApiService(BaseApiService):
 
             # Attempt to get the country (check if 'country' is present)
             country_name = city_info.get('country', None) or city_info.get('country_code', None)  # Try country first, then country_code
-            country = None
             if country_name:
                 self.logger.debug(f"Extracted country: {country_name} from city info")
-                self.logger.debug(f"Searching for country: {country_name}")
-                
-                # Check if the country already exists in the database
-                country = self.session.query(Country).filter_by(name=country_name).first()
-                
-                if country:
-                    self.logger.debug(f"Country {country_name} already exists in the database, skipping creation.")
-                else:
-                    # Country not found, adding it to the database
-                    self.logger.debug(f"Country not found in database. Adding new country: {country_name}")
-                    country = Country(name=country_name, timezone=city_info.get('timezone', 'Unavailable'))
-                    self.session.add(country)
-                    self.session.commit()
+                timezone = city_info.get('timezone', 'Unavailable')
             else:
                 # Log a warning if no country is found in the API data
                 self.logger.warning(f"No country found for city: {city_info['name']}. Storing as unavailable.")
-                # Save as unavailable if no country data
-                country = Country(name="Unavailable", timezone="Unavailable")
-                self.session.add(country)
-                self.session.commit()
+                # Every city without a country shares the one "Unavailable" row
+                country_name = timezone = "Unavailable"
+
+            # Add the country with INSERT OR IGNORE, reading back the stored row if it is already
+            # there under any spelling, so it is reused rather than duplicated
+            country = (
+                self.session.scalars(STMT_INSERT_COUNTRY, {"name": country_name, "timezone": timezone}).first()
+                or self.session.scalars(STMT_COUNTRY_BY_NAME, {"name": country_name}).first()
+            )
+            self.logger.debug(f"Using country: {country}")
 
             # Insert city data (even if no country is linked)
             self.logger.debug(f"Creating city with name: {city_info['name']}, Latitude: {city_info['latitude']}, Longitude: {city_info['longitude']}")
@@ -110,9 +166,13 @@ class GeocodingApiService(BaseApiService):
                 country_id=country.id if country else None  
             )
             self.session.add(city)
-            self.session.commit()
+            if commit:
+                # Commit the country and city in a single transaction
+                self.session.commit()
+            else:
+                self.session.flush()
             self.logger.debug(f"City {city.name} added to the database with ID {city.id}")
-            return [city]
+            return city
 
         except SQLAlchemyError as e:
             self.session.rollback()
@@ -126,4 +186,4 @@ class GeocodingApiService(BaseApiService):
         except Exception as e:
             self.session.rollback()
             self.logger.error(f"Unexpected error occurred: {e}")
-            raise
\ No newline at end of file
+            raise
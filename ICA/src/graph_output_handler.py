@@ -1,6 +1,8 @@
 import logging
+import numpy as np
 import matplotlib.pyplot as plt
 from constants import MONTH_NAMES
+from output_handler_registry import OutputHandlerRegistry
 
 class GraphOutputHandler:
     """
@@ -10,6 +12,7 @@ class GraphOutputHandler:
     logger = logging.getLogger(__name__)
 
     @staticmethod
+    @OutputHandlerRegistry.register("bar_chart", "pie_chart")
     def handle_graph(choice, labels, values, title, xlabel=None, ylabel=None):
         """
         Routes the graph display based on user choice.
@@ -29,10 +32,10 @@ class GraphOutputHandler:
         ylabel : str, optional
             The label for the y-axis.
         """
-        GraphOutputHandler.logger.info(f"Title: {title}, X-Label: {xlabel}, Y-Label: {ylabel}")
-        GraphOutputHandler.logger.info(f"Graph type: {choice}")
-        GraphOutputHandler.logger.info(f"Labels: {labels}")
-        GraphOutputHandler.logger.info(f"Values: {values}")
+        GraphOutputHandler.logger.info("Title: %s, X-Label: %s, Y-Label: %s", title, xlabel, ylabel)
+        GraphOutputHandler.logger.info("Graph type: %s", choice)
+        GraphOutputHandler.logger.info("Labels: %s", labels)
+        GraphOutputHandler.logger.info("Values: %s", values)
 
         # Convert values to float if they are in string format
         values = [float(v) if isinstance(v, str) else v for v in values]
@@ -44,16 +47,18 @@ class GraphOutputHandler:
             print("No valid numeric data to display as a graph.")
             return
 
-        labels, values = zip(*valid_data)
+        # One array per column, so matplotlib takes the values without converting them element by element
+        labels = [label for label, _ in valid_data]
+        values = np.fromiter((value for _, value in valid_data), dtype=np.float64, count=len(valid_data))
 
-        GraphOutputHandler.logger.debug(f"Filtered Labels: {labels}")
-        GraphOutputHandler.logger.debug(f"Filtered Values: {values}")
+        GraphOutputHandler.logger.debug("Filtered Labels: %s", labels)
+        GraphOutputHandler.logger.debug("Filtered Values: %s", values)
 
         try:
             if choice == 2:
                 GraphOutputHandler.plot_bar(labels, values, title, xlabel, ylabel)
             elif choice == 3:
-                GraphOutputHandler.plot_pie(values, labels, title)
+                GraphOutputHandler.plot_pie(labels, values, title)
             else:
                 print(f"Graph type '{choice}' is not supported.")
         except ValueError as e:
@@ -63,7 +68,7 @@ class GraphOutputHandler:
             print("Results:", values)
 
     @staticmethod
-    def plot_bar(labels: list[str], values: list[int], title: str, xlabel: str, ylabel: str):
+    def plot_bar(labels: list[str], values: np.ndarray, title: str, xlabel: str, ylabel: str):
         """
         Plot a bar chart using the given labels and values.
 
@@ -71,8 +76,8 @@ class GraphOutputHandler:
         ----------
         labels : list[str]
             A list of labels for the x-axis.
-        values : list[int]
-            A list of numerical values for the y-axis.
+        values : np.ndarray
+            Numerical values for the y-axis, as a float array (lists are converted).
         title : str
             The title of the bar chart.
         xlabel : str
@@ -82,16 +87,17 @@ class GraphOutputHandler:
         """
         plt.close('all')
 
-        GraphOutputHandler.logger.debug(f"plot bar, title: {title}")
-        GraphOutputHandler.logger.debug(f"plot bar, xlabel: {xlabel}")
-        GraphOutputHandler.logger.debug(f"plot bar, ylabel: {ylabel}")
-        GraphOutputHandler.logger.debug(f"plot bar, Labels: {labels}")
-        GraphOutputHandler.logger.debug(f"plot bar, Values: {values}")
+        GraphOutputHandler.logger.debug("plot bar, title: %s", title)
+        GraphOutputHandler.logger.debug("plot bar, xlabel: %s", xlabel)
+        GraphOutputHandler.logger.debug("plot bar, ylabel: %s", ylabel)
+        GraphOutputHandler.logger.debug("plot bar, Labels: %s", labels)
+        GraphOutputHandler.logger.debug("plot bar, Values: %s", values)
 
         # labels = [str(label) if not isinstance(label, str) else label for label in labels]
 
         try:
-            if not values or sum([v for v in values if isinstance(v, (int, float))]) == 0:
+            values = np.asarray(values, dtype=np.float64)
+            if not values.any():
                 GraphOutputHandler.logger.warning("No valid data for bar chart.")
                 print("No valid data available for bar chart.")
                 return
@@ -107,7 +113,7 @@ class GraphOutputHandler:
         except Exception as e:
             GraphOutputHandler.logger.error(f"Error plotting bar chart: {e}")
             print(f"Error generating chart: {e}. Falling back to console output.")
-            GraphOutputHandler.logger.debug(f"Labels: {labels}, Values: {values}")
+            GraphOutputHandler.logger.debug("Labels: %s, Values: %s", labels, values)
 
 
     @staticmethod
@@ -117,20 +123,20 @@ class GraphOutputHandler:
 
         Parameters
         ----------
-        values : list[int]
-            A list of numerical values for the y-axis.
         labels : list[str]
-            A list of labels for the x-axis.
+            A list of labels for the slices.
+        values : np.ndarray
+            Numerical values for the slices, as a float array (lists are converted).
         title : str
             The title of the bar chart.
         """
         plt.close('all')
         try:
-            if not values or sum([v for v in values if isinstance(v, (int, float))]) == 0:
+            values = np.asarray(values, dtype=np.float64)
+            if not values.any():
                 GraphOutputHandler.logger.warning("No valid data for pie chart.")
                 return
 
-            values = [float(v) for v in values]
             plt.figure(figsize=(8, 8))
             plt.pie(values, labels=labels, autopct="%1.1f%%", startangle=140)
             plt.title(title)
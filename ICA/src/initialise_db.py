@@ -1,23 +1,29 @@
 from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker
-from models import Base
+from models import Base, MonthlyWeatherSummary
+from constants import DB_PATH
 import logging
 import os
 
-def initialise_db(db_path: str):
+logger = logging.getLogger("initialize_db")
+
+# Bump whenever the models gain tables or indexes, so existing databases are brought up to date
+SCHEMA_VERSION = 4
+
+def initialise_db(db_path: str, engine=None):
     """
     Initialize the database, setting up the schema and ensuring the correct constraints.
-    """
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler()  # Output to console
-        ]
-    )
-    logger = logging.getLogger("initialize_db")
+    The schema version is recorded in SQLite's user_version, and the DDL is skipped
+    when the database is already at SCHEMA_VERSION.
 
+    Parameters
+    ----------
+    db_path : str
+        The path to the SQLite database file.
+    engine : Engine, optional
+        An existing engine for the database. A new engine is created if None.
+    """
     try:
         abs_db_path = db_path
         # Ensure the directory for the database exists
@@ -30,25 +36,54 @@ def initialise_db(db_path: str):
             raise PermissionError(f"Cannot write to the database file: {abs_db_path}")
 
         # Create engine and connect to the SQLite database
-        engine = create_engine(f"sqlite:///{abs_db_path}")
-        print(f"engine: {engine}")
+        if engine is None:
+            engine = create_engine(f"sqlite:///{abs_db_path}")
+        logger.debug("engine: %s", engine)
+
+        with engine.connect() as connection:
+            version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+        if version >= SCHEMA_VERSION:
+            logger.info(f"Database schema is up to date (version {version}).")
+            return
 
         # Create tables based on models
         logger.info("Creating tables...")
         Base.metadata.create_all(engine)
         logger.info("Tables created successfully.")
 
+        with engine.begin() as connection:
+            # create_all skips indexes on tables that already exist, so add any that are missing.
+            # IF NOT EXISTS is used because SQLAlchemy cannot reflect the expression indexes to
+            # check for them, and checkfirst would try to create those again on every upgrade
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+
+            # Rebuild the monthly roll-up from the daily rows; it is kept current as new rows are stored
+            connection.execute(MonthlyWeatherSummary.refresh_statement())
+            # Gather statistics so the query planner makes use of the new indexes
+            connection.exec_driver_sql("ANALYZE")
+            connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
         # Open a session to verify insertion
         Session = sessionmaker(bind=engine)
         session = Session()
         session.close()
 
         logger.info("Database initialization completed successfully.")
-    except Exception as e:
-        logger.error(f"An error occurred during database initialization: {e}")
+    except Exception:
+        # Re-raised so a failed upgrade is not mistaken for an up-to-date schema
+        logger.exception("An error occurred during database initialization")
+        raise
 
 
 if __name__ == "__main__":
-    DB_PATH = "db\\CIS4044-N-SDI-OPENMETEO-PARTIAL.db"
-    print("initialise_db db_path: {DB_PATH}")
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.StreamHandler()  # Output to console
+        ]
+    )
+    print(f"initialise_db db_path: {DB_PATH}")
     initialise_db(DB_PATH)
@@ -4,8 +4,13 @@ Module for handling user input validation.
 This module provides methods for user input validation. It ensures all inputs
 are valid before being passed to other parts of the application.
 """
-from datetime import datetime
+from datetime import date
 import logging
+import re
+
+# yyyy-mm-dd, matched once per attempt instead of going through strptime's format parsing;
+# ASCII digits only, as for the other numeric prompts
+_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$", re.ASCII)
 
 
 class InputHandler:
@@ -30,21 +35,18 @@ class InputHandler:
         int
             The validated integer input provided by the user.
 
-        Raises
-        ------
-        ValueError
-            If the user input is not a valid integer, the user will be prompted again.
+        Notes
+        -----
+        Anything other than a non-negative whole number is rejected and the user is prompted again.
         """
         while True:
-            try:
-                choice = int(input(prompt))
-                if choice < 0:
-                    InputHandler.logger.warning(f"Invalid input: {choice}. It must be a positive integer.")
-                    raise ValueError("Input must be a positive integer.")
-                return choice
-            except ValueError:
-                InputHandler.logger.warning(f"User entered invalid input. Prompt: {prompt}")
-                print("Invalid input. Please enter a valid number.")
+            user_input = input(prompt).strip()
+            # ASCII digits only: rejects signs and non-numeric input without raising, and
+            # excludes Unicode digits such as "²" that isdigit() accepts but int() does not
+            if user_input.isascii() and user_input.isdigit():
+                return int(user_input)
+            InputHandler.logger.warning(f"User entered invalid input. Prompt: {prompt}")
+            print("Invalid input. Please enter a valid number.")
 
 
     @staticmethod
@@ -67,8 +69,9 @@ class InputHandler:
         The year input must consist of exactly four digits (e.g., "2020").
         """
         while True:
-            user_input = input(prompt)
-            if len(user_input) == 4 and user_input.isdigit():
+            user_input = input(prompt).strip()
+            # A plain length and character check; no regex is needed for four ASCII digits
+            if len(user_input) == 4 and user_input.isascii() and user_input.isdigit():
                 return user_input
             print("Invlaid input. Enter a year as 4 digits i.e 2020")
 
@@ -88,24 +91,47 @@ class InputHandler:
         str
             The validated date input as a string in the format yyyy-mm-dd.
 
-        Raises
-        ------
-        ValueError
-            If the user input does not conform to the expected date format or is invalid.
-
         Notes
         -----
         The date must be valid and conform to the format yyyy-mm-dd.
         """
+        return InputHandler.get_date(prompt).isoformat()
+
+
+    @staticmethod
+    def get_date(prompt: str) -> date:
+        """
+        Prompt the user for a date in the format yyyy-mm-dd and return it parsed, for callers
+        that work with the date itself and would otherwise parse the string again.
+
+        Parameters
+        ----------
+        prompt : str
+            The prompt message to display to the user.
+
+        Returns
+        -------
+        date
+            The validated date, which is not in the future.
+
+        Notes
+        -----
+        Invalid or future dates are rejected and the user is prompted again.
+        """
+        # Sampled once; the date won't change meaningfully while the user retries
+        today = date.today()
         while True:
-            user_input = input(prompt)
+            user_input = input(prompt).strip()
             try:
-                date = datetime.strptime(user_input, "%Y-%m-%d")
+                match = _DATE_RE.match(user_input)
+                if not match:
+                    raise ValueError(f"Date does not match yyyy-mm-dd: {user_input}")
                 # Parse the input string to validate it as a date
-                if date > datetime.now():
+                parsed_date = date(int(match[1]), int(match[2]), int(match[3]))
+                if parsed_date > today:
                     print("The start date cannot be in the future. Please try again.")
                     continue
-                return date.strftime("%Y-%m-%d")
+                return parsed_date
             except ValueError:
                 InputHandler.logger.warning("User entered an invalid date.")
                 print("Invalid input. Please enter a date in the format yyyy-mm-dd (e.g., 2021-01-01).")
@@ -1,14 +1,36 @@
 import logging
-from datetime import datetime, timedelta
-from sqlalchemy.orm import joinedload
+import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from statistics import fmean
+from typing import Optional
+from requests.adapters import HTTPAdapter
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql import func
-from weather_data import WeatherData
 from weather_api_service import WeatherApiService
 from session_manager import SessionManager
 from geocoding_api_service import GeocodingApiService
+from statements import (
+    LOAD_CITY_COUNTRY, STMT_CITY_BY_NAME, STMT_COUNTRY_BY_NAME, STMT_INSERT_COUNTRY,
+    STMT_MONTHLY_PRECIP_BY_COUNTRY, STMT_PRECIP_FOR_PERIOD,
+)
 from models import *
 from constants import *
 
+# Statements are built once so SQLAlchemy's compiled statement cache is reused across calls;
+# those shared with other modules live in statements.py
+# Adds a city, reading its country ID inside the same statement instead of a separate SELECT
+_STMT_INSERT_CITY_FOR_COUNTRY = select(City).from_statement(text("""
+    INSERT INTO cities (name, latitude, longitude, timezone, country_id)
+    SELECT :name, :latitude, :longitude, :timezone, id FROM countries WHERE lower(name) = lower(:country_name) LIMIT 1
+    RETURNING id, name, latitude, longitude, timezone, country_id
+"""))
+# Records the city a searched name resolved to; a name already recorded keeps its first city
+_STMT_INSERT_ALIAS = sqlite_insert(LocationAlias).on_conflict_do_nothing()
+
 class LocationManager:
     """
     Manages location-related operations, including geocoding and database interactions.
@@ -19,72 +41,296 @@ class LocationManager:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.session_manager = session_manager
         self.db_session = session_manager.get_session()
+        # The geocoding client's keep-alive HTTP session is shared with the weather client, with its
+        # HTTPS pool enlarged for the concurrent lookups; the adapter it replaces is closed
         self.geocoding_service = geocoding_service
-        self.weather_service = WeatherApiService(self.db_session)
+        self._http = geocoding_service.http_session
+        default_adapter = self._http.get_adapter("https://")
+        self._http.mount("https://", HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE))
+        default_adapter.close()
+        self.weather_service = WeatherApiService(self.db_session, http_session=self._http)
+        self._annual_precip_cache = {}
+        self._city_cache = OrderedDict()
+        self._country_cache = OrderedDict()
+        # Searched name -> city ID, loaded from location_aliases on first use
+        self._aliases = None
+
+
+    def close(self):
+        """
+        Closes the shared HTTP session and its pooled connections.
+        """
+        self._http.close()
 
 
-    def ensure_location_in_database(self, location_name):
+    def ensure_location_in_database(self, location_name, resolver=None) -> Optional[City]:
         """
         Ensures that a city with the given name exists in the database. If the city does not exist,
         it fetches the city data using the Geocoding API, creates a new country (if necessary),
-        and then adds the city to the database. If multiple cities are found, the user is prompted
-        to select one.
+        and then adds the city to the database. If multiple cities are found, the resolver
+        selects one.
 
         Parameters
         ----------
         location_name : str
             The name of the city to ensure exists in the database.
+        resolver : callable, optional
+            Called with the list of geocoding results when there is more than one,
+            returning the result to use. The first result is used if None.
 
         Returns
         -------
-        city : City
-            The city object, either newly created or fetched from the database.
+        City or None
+            The city object, either newly created or fetched from the database,
+            or None if it could not be found.
         """
-        city_info = None
         self.session_manager.log_session_details()
-        self.logger.debug(f"Starting transaction for '{location_name}'")
+        self.logger.debug("Starting transaction for '%s'", location_name)
+
+        city = self._resolve_or_create_city(location_name, resolver)
+        self.logger.debug("This is the return value: %s", city)
+        return city
+
+
+    def _resolve_or_create_city(self, location_name, resolver=None):
+        """
+        Resolves a city by name, checking the database first and only calling the
+        Geocoding API when the city is not stored yet. New countries and cities are
+        added to the database.
+
+        Parameters
+        ----------
+        location_name : str
+            The name of the city to resolve.
+        resolver : callable, optional
+            Selects one of several geocoding results. The first result is used if None.
 
+        Returns
+        -------
+        City or None
+            The resolved city, or None if the Geocoding API returned no data.
+        """
         # Check if the city already exists in the database
-        self.logger.debug(f"Checking if city '{location_name}' exists in the database.")
+        self.logger.debug("Checking if city '%s' exists in the database.", location_name)
         city = self.get_city_from_db(location_name)
         if city:
-            self.logger.info(f"City '{location_name}' already exists in the database.")
-            return [city]
+            self.logger.info("City '%s' already exists in the database.", location_name)
+            return city
+
+        # A name that was geocoded before resolves to the stored city without another API call
+        alias = self._normalise(location_name)
+        city_id = self._get_aliases().get(alias)
+        if city_id is not None:
+            city = self.db_session.get(City, city_id)
+            if city:
+                self.logger.info("Location '%s' resolved to stored city '%s'.", location_name, city.name)
+                self._cache_put(self._city_cache, location_name, city)
+                return city
 
         # Fetch the city data from the Geocoding API
-        self.logger.debug(f"Fetching city data for '{location_name}' from Geocoding API.")
-        location_data_list = self.geocoding_service.fetch_city_data(location_name)
-        if len(location_data_list) > 1:
-            # If multiple cities are found, prompt the user to select one
-            self.logger.info(f"Multiple locations found for '{location_name}'. Please select one:")
-            for idx, loc in enumerate(location_data_list):
-                self.logger.debug(f"{idx + 1}. {loc.name}, {loc.country} (Lat: {loc.latitude}, Lon: {loc.longitude})")
-
-            # Here, you'd have a method to handle user input. For simplicity, assume user selects the first city.
-            choice = 0  # Assume user selected the first city for simplicity, replace with actual input handling
-            city_info = location_data_list[choice]
-            self.logger.debug(f"City info selected: {city_info}")
+        self.logger.debug("Fetching city data for '%s' from Geocoding API.", location_name)
+        try:
+            location_data_list = self.geocoding_service.search_city(location_name)
+        except (ValueError, requests.RequestException) as e:
+            # search_city raises rather than returning an empty list when nothing matches,
+            # and a network failure leaves the city just as unresolved
+            self.logger.error("City '%s' could not be fetched from Open-Meteo API: %s", location_name, e)
+            return None
+
+        if len(location_data_list) > 1 and resolver is not None:
+            # If multiple cities are found, let the caller select one
+            self.logger.info("Multiple locations found for '%s'. Please select one:", location_name)
+            city_info = resolver(location_data_list)
+            self.logger.debug("City info selected: %s", city_info)
         else:
             city_info = location_data_list[0]
-            self.logger.debug(f"Single city found: {city_info}")
+            self.logger.debug("Single city found: %s", city_info)
+
+        city_name = city_info['name']
+        country_name = city_info.get('country') or city_info.get('country_code') or "Unavailable"
+        timezone = city_info.get('timezone', "Unavailable")
+        # The database was only checked for the searched name, which the geocoded name may not match
+        known_missing = city_name.lower() == location_name.lower()
+        try:
+            if known_missing:
+                city = self._upsert_city_with_country(
+                    city_name, city_info['latitude'], city_info['longitude'], country_name, timezone
+                )
+            else:
+                # Ensure the country exists in the database, or create it if it doesn't
+                self.logger.debug("Ensuring country '%s' exists in the database.", country_name)
+                country = self.ensure_country_exists(country_name, timezone=timezone, commit=False)
+
+                # Ensure the city exists, or create it if it doesn't
+                self.logger.debug("Ensuring city '%s' exists in the database.", city_name)
+                city = self.ensure_city_exists(
+                    city_name, city_info['latitude'], city_info['longitude'], country,
+                    timezone=timezone, commit=False
+                )
+
+            if alias != city.name.lower():
+                self.db_session.execute(_STMT_INSERT_ALIAS, {"name": alias, "city_id": city.id})
+
+            # Commit the country, city and alias in a single transaction
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            self.invalidate(country_name)
+            self.invalidate(city_name)
+            self.logger.error("Failed to add location '%s': %s", location_name, e)
+            raise
+
+        self._aliases.setdefault(alias, city.id)
+        self.logger.info("Location '%s' added to the database.", location_name)
+        return city
+
+
+    def _get_aliases(self):
+        """
+        Return the searched name -> city ID mapping, reading the location_aliases table
+        the first time it is needed.
+
+        Returns
+        -------
+        dict
+            City IDs keyed by normalised location name.
+        """
+        if self._aliases is None:
+            self._aliases = dict(self.db_session.execute(select(LocationAlias.name, LocationAlias.city_id)).all())
+            self.logger.debug("Loaded %s location aliases.", len(self._aliases))
+        return self._aliases
+
+
+    @staticmethod
+    def _normalise(location_name):
+        """
+        Normalise a location name for use as a location_aliases or lookup cache key.
+        """
+        return location_name.strip().lower()
+
+
+    def _upsert_city_with_country(self, city_name, latitude, longitude, country_name, timezone):
+        """
+        Adds a city that is known not to be stored, creating its country if needed, in two
+        statements without a SELECT in between: an INSERT OR IGNORE for the country, then an
+        INSERT ... SELECT for the city that reads the country ID as it inserts. Nothing is committed.
+
+        Parameters
+        ----------
+        city_name : str
+            The name of the city to add.
+        latitude : float
+            The latitude of the city.
+        longitude : float
+            The longitude of the city.
+        country_name : str
+            The name of the country the city belongs to.
+        timezone : str
+            The timezone to store for the city and a newly created country.
 
-        # Ensure the country exists in the database, or create it if it doesn't
-        self.logger.debug(f"Ensuring country '{city_info.country}' exists in the database.")
-        country = self.ensure_country_exists(location_name)
+        Returns
+        -------
+        City
+            The newly created city.
+        """
+        country = self._cache_get(self._country_cache, country_name)
+        if country is None and self.db_session.get_bind().dialect.insert_returning:
+            self.logger.debug("Adding city '%s' and country '%s' if missing.", city_name, country_name)
+            country = self.db_session.scalars(STMT_INSERT_COUNTRY, {"name": country_name, "timezone": timezone}).first()
+            if country:
+                self._cache_put(self._country_cache, country_name, country)
+
+            city = self.db_session.scalars(_STMT_INSERT_CITY_FOR_COUNTRY, {
+                "name": city_name,
+                "latitude": latitude,
+                "longitude": longitude,
+                "timezone": timezone,
+                "country_name": country_name,
+            }).first()
+            self._cache_put(self._city_cache, city_name, city)
+            return city
 
-        # Ensure the city exists, or create it if it doesn't
-        self.logger.debug(f"Ensuring city '{city_info.name}' exists in the database.")
-        city = self.ensure_city_exists(city_info.name, city_info.latitude, city_info.longitude, country)
+        # The country is already loaded, or RETURNING is unavailable (SQLite before 3.35)
+        country = country or self.ensure_country_exists(country_name, timezone=timezone, commit=False)
+        return self.ensure_city_exists(
+            city_name, latitude, longitude, country, timezone=timezone, commit=False, known_missing=True
+        )
 
-        # Commit the transaction
-        self.session_manager.commit_session()
-        self.logger.info(f"Location '{location_name}' added to the database.")
 
-        self.logger.debug(f"This is the return value: {city}")
-        return [city]
+    def ensure_locations_in_database(self, location_names):
+        """
+        Ensures that several cities exist in the database. Cities that are not stored yet
+        are looked up on the Geocoding API concurrently, then added in a single transaction.
+        When the API returns several matches for a name, the first one is used.
 
+        Parameters
+        ----------
+        location_names : list[str]
+            The names of the cities to ensure exist in the database.
 
-    def ensure_country_exists(self, country_name):
+        Returns
+        -------
+        dict
+            A mapping of each location name to its City object, or None if it could not be resolved.
+        """
+        found = self.get_cities_from_db(location_names)
+        cities = {name: found.get(name) for name in location_names}
+        missing = [name for name, city in cities.items() if city is None]
+        if not missing:
+            return cities
+
+        # The API calls are network bound, so run them concurrently; database work stays on this thread
+        self.logger.debug("Fetching city data for %s locations from Geocoding API.", len(missing))
+        with ThreadPoolExecutor(max_workers=GEOCODING_WORKERS) as executor:
+            results = dict(zip(missing, executor.map(self._search_city, missing)))
+
+        try:
+            for name, data in results.items():
+                if not data:
+                    continue
+                city_info = data[0]
+                city = self.get_city_from_db(city_info['name'])
+                if not city:
+                    city = self.geocoding_service.save_city(city_info, commit=False)
+                    self._cache_put(self._city_cache, city.name, city)
+                cities[name] = city
+
+            # Commit all new countries and cities in a single transaction
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            for name, data in results.items():
+                self.invalidate(name)
+                if data:
+                    self.invalidate(data[0]['name'])
+            self.logger.error("Failed to add locations %s: %s", missing, e)
+            raise
+
+        return cities
+
+
+    def _search_city(self, location_name):
+        """
+        Search the Geocoding API for a city, returning None instead of raising on failure.
+
+        Parameters
+        ----------
+        location_name : str
+            The name of the city to search for.
+
+        Returns
+        -------
+        list[dict] or None
+            The geocoding results, or None if the lookup failed.
+        """
+        try:
+            return self.geocoding_service.search_city(location_name)
+        except Exception as e:
+            self.logger.error("City '%s' could not be fetched from Open-Meteo API: %s", location_name, e)
+            return None
+
+
+    def ensure_country_exists(self, country_name, timezone="Unavailable", commit=True):
         """
         Ensures that a country with the given name exists in the database.
         If the country does not exist, it creates a new country.
@@ -93,25 +339,36 @@ class LocationManager:
         ----------
         country_name : str
             The name of the country to ensure exists in the database.
+        timezone : str
+            The timezone to store for a newly created country.
+        commit : bool
+            Commit a newly created country. If False the country is only flushed,
+            leaving the commit to the caller's transaction.
 
         Returns
         -------
         country : Country
             The Country object, either newly created or fetched from the database.
         """
-        country = self.db_session.query(Country).filter(Country.name.ilike(country_name)).first()
-        if not country:
-            self.logger.debug(f"Country '{country_name}' not found, creating new entry.")
-            country = Country(name=country_name, timezone="Unavailable")
-            self.db_session.add(country)
-            self.session_manager.commit_session()
-            self.logger.info(f"Country '{country_name}' added to the database.")
+        country = self._cache_get(self._country_cache, country_name)
+        if country:
+            self.logger.debug("Country '%s' already exists in the database.", country_name)
+            return country
+
+        # Insert first rather than SELECT-then-INSERT; an existing country makes the insert a no-op
+        country = self.db_session.scalars(STMT_INSERT_COUNTRY, {"name": country_name, "timezone": timezone}).first()
+        if country:
+            self._write(commit)
+            self.logger.info("Country '%s' added to the database.", country_name)
         else:
-            self.logger.debug(f"Country '{country_name}' already exists in the database.")
+            country = self.get_country_from_db(country_name, cache=False)
+            self.logger.debug("Country '%s' already exists in the database.", country_name)
+
+        self._cache_put(self._country_cache, country_name, country)
         return country
 
 
-    def ensure_city_exists(self, city_name, latitude, longitude, country):
+    def ensure_city_exists(self, city_name, latitude, longitude, country, timezone="Unavailable", commit=True, known_missing=False):
         """
         Ensures that a city with the given name, latitude, and longitude exists in the database.
         If the city does not exist, it creates a new city and associates it with the provided country.
@@ -126,145 +383,226 @@ class LocationManager:
             The longitude of the city.
         country : Country
             The Country object to associate the city with.
+        timezone : str
+            The timezone to store for a newly created city.
+        commit : bool
+            Commit a newly created or relinked city. If False the changes are only flushed,
+            leaving the commit to the caller's transaction.
+        known_missing : bool
+            Set when the caller has just checked that the city is not stored,
+            to skip looking it up again.
 
         Returns
         -------
         city : City
             The City object, either newly created or fetched from the database.
         """
-        city = self.db_session.query(City).filter_by(name=city_name).first()
+        city = None if known_missing else self.get_city_from_db(city_name)
 
         if not city:
-            self.logger.debug(f"City '{city_name}' not found, creating new entry.")
-            city = City(name=city_name, latitude=latitude, longitude=longitude, timezone="Unavailable", country_id=country.id)
+            self.logger.debug("City '%s' not found, creating new entry.", city_name)
+            city = City(name=city_name, latitude=latitude, longitude=longitude, timezone=timezone, country=country)
             self.db_session.add(city)
-            self.session_manager.commit_session()
-            self.logger.info(f"City '{city_name}' added to the database with ID {city.id}.")
+            self._write(commit)
+            self._cache_put(self._city_cache, city_name, city)
+            self.logger.info("City '%s' added to the database with ID %s.", city_name, city.id)
         else:
-            self.logger.debug(f"City '{city_name}' already exists in the database.")
+            self.logger.debug("City '%s' already exists in the database.", city_name)
         
         # Ensure the city is linked to a valid country
         if not city.country:
-            self.logger.debug(f"City '{city_name}' does not have a valid country association, linking to country '{country.name}'.")
+            self.logger.debug("City '%s' does not have a valid country association, linking to country '%s'.", city_name, country.name)
             city.country = country
-            self.db_session.commit()
+            self._write(commit)
         
         return city
 
-    def get_city_from_db(self, location_name):
+
+    def _write(self, commit):
+        """
+        Commit the pending changes, or flush them so generated IDs are available
+        without ending the current transaction.
+        """
+        if commit:
+            self.session_manager.commit_session()
+        else:
+            self.db_session.flush()
+
+    def get_city_from_db(self, location_name, cache=True):
         """
         Check if the city already exists in the database.
 
         Parameters
         ----------
         location_name : str
-            Name of the city to check.
+            Name of the city to check (case-insensitive).
+        cache : bool
+            Whether to serve the lookup from, and store it in, the in-process city cache.
 
         Returns
         -------
         City or None
             The city if found, otherwise None.
         """
-        self.logger.debug(f"Checking if location '{location_name}' exists in the database.")
-        return self.db_session.query(City).options(joinedload(City.country)).filter_by(name=location_name).first()
+        if cache:
+            city = self._cache_get(self._city_cache, location_name)
+            if city is not None:
+                return city
+
+        self.logger.debug("Checking if location '%s' exists in the database.", location_name)
+        city = self.db_session.execute(STMT_CITY_BY_NAME, {"name": location_name}).unique().scalars().first()
+
+        if cache and city is not None:
+            self._cache_put(self._city_cache, location_name, city)
+        return city
 
 
-    def fetch_location_weather_data(self, city_data, start_date, end_date):
+    def get_cities_from_db(self, location_names, cache=True):
         """
-        Fetch historical weather data for a location.
+        Look up several cities at once, querying the database in a single statement
+        for the names that are not already cached.
 
         Parameters
         ----------
-        location_name : str
-            Name of the location to fetch weather data for.
-        start_date : str
-            Start date for the weather data (format: yyyy-mm-dd).
-        end_date : str
-            End date for the weather data (format: yyyy-mm-dd).
+        location_names : list[str]
+            Names of the cities to look up (case-insensitive).
+        cache : bool
+            Whether to serve the lookups from, and store them in, the in-process city cache.
 
         Returns
         -------
         dict
-            Weather data fetched for the location.
+            A mapping of each found city name to its City. Names that are not stored are omitted.
         """
-        self.logger.debug(f"Checking if location '{city_data}' exists in the database.")
-
-        # Get the city from the data
-        city = self.get_city_from_data(city_data)
+        cities = {}
+        to_query = []
+        for name in location_names:
+            city = self._cache_get(self._city_cache, name) if cache else None
+            if city is not None:
+                cities[name] = city
+            else:
+                to_query.append(name)
+
+        if to_query:
+            self.logger.debug("Checking if %s locations exist in the database.", len(to_query))
+            stmt = (
+                select(City)
+                .options(LOAD_CITY_COUNTRY)
+                .where(func.lower(City.name).in_([func.lower(name) for name in to_query]))
+            )
+            rows = {}
+            for city in self.db_session.execute(stmt).unique().scalars():
+                # Keep the first match for duplicated names, as get_city_from_db does
+                rows.setdefault(city.name.lower(), city)
+            for name in to_query:
+                city = rows.get(name.lower())
+                if city is not None:
+                    cities[name] = city
+                    if cache:
+                        self._cache_put(self._city_cache, name, city)
+        return cities
+
+
+    def get_country_from_db(self, country_name, cache=True):
+        """
+        Check if the country already exists in the database.
 
-        if not city:
-            self.logger.error(f"City '{city_data}' not found in the database.")
-            return {}
+        Parameters
+        ----------
+        country_name : str
+            Name of the country to check (case-insensitive).
+        cache : bool
+            Whether to serve the lookup from, and store it in, the in-process country cache.
 
-        # Fetch weather data for the city
-        weather_data = self.fetch_weather_data_for_city(city, start_date, end_date)
+        Returns
+        -------
+        Country or None
+            The country if found, otherwise None.
+        """
+        if cache:
+            country = self._cache_get(self._country_cache, country_name)
+            if country is not None:
+                return country
 
-        if not weather_data:
-            self.logger.error(f"Failed to fetch valid weather data for city '{city.name}'.")
-            return {}
+        country = self.db_session.execute(STMT_COUNTRY_BY_NAME, {"name": country_name}).scalars().first()
 
-        # Process and store the weather data
-        return self.process_weather_data(weather_data, city)
+        if cache and country is not None:
+            self._cache_put(self._country_cache, country_name, country)
+        return country
 
 
-    def get_city_from_data(self, city_data):
+    def invalidate(self, name):
         """
-        Extracts the city object from the provided city data.
+        Remove a location from the in-process city and country caches.
 
         Parameters
         ----------
-        city_data : list or City
-            City data which can either be a list (if multiple cities) or a single city object.
+        name : str
+            The city or country name to remove.
+        """
+        key = self._normalise(name)
+        self._city_cache.pop(key, None)
+        self._country_cache.pop(key, None)
 
-        Returns
-        -------
-        City or None
-            The city object if found, otherwise None.
+
+    def _cache_get(self, cache, name):
         """
-        if isinstance(city_data, list) and city_data:
-            city = city_data[0]
-            self.logger.debug(f"Location data is a list, using the first city: {city.name}")
-            return city
-        elif isinstance(city_data, City):
-            self.logger.debug(f"Location data is already a City object: {city_data.name}")
-            return city_data
-        else:
-            self.logger.error(f"Invalid city data provided: {city_data}")
-            return None
+        Look up a name in an LRU cache, marking it as most recently used.
+        """
+        key = self._normalise(name)
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
 
 
-    def fetch_weather_data_for_city(self, city, start_date, end_date):
+    def _cache_put(self, cache, name, value):
         """
-        Fetch weather data for a given city from the weather API.
+        Store a value in an LRU cache, evicting the least recently used entry when full.
+        """
+        key = self._normalise(name)
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > LOCATION_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+    def fetch_location_weather_data(self, city, start_date, end_date):
+        """
+        Fetch historical weather data for a location.
 
         Parameters
         ----------
-        city : City
-            The city for which to fetch weather data.
+        city : City or None
+            The city to fetch weather data for, as returned by ensure_location_in_database.
         start_date : str
-            The start date for the weather data (yyyy-mm-dd).
+            Start date for the weather data (format: yyyy-mm-dd).
         end_date : str
-            The end date for the weather data (yyyy-mm-dd).
+            End date for the weather data (format: yyyy-mm-dd).
 
         Returns
         -------
-        WeatherData or None
-            The weather data for the city, or None if the data is invalid or fetching failed.
+        dict
+            Weather data fetched for the location.
         """
-        self.logger.debug(f"Fetching weather data for city: {city.name} (Lat: {city.latitude}, Lon: {city.longitude})")
-        
-        weather_data = self.weather_service.fetch_weather_data(
-            city.latitude, city.longitude, start_date, end_date, city.id
-        )
+        if city is None:
+            self.logger.error("No city provided to fetch weather data for.")
+            return {}
 
-        self.logger.debug(f"location_manager, weather data type {type(weather_data)}")
+        # Fetch weather data for the city
+        weather_data = self.fetch_weather_data_for_city(city, start_date, end_date)
 
-        return weather_data
+        if not weather_data:
+            self.logger.error("Failed to fetch valid weather data for city '%s'.", city.name)
+            return {}
+
+        # Process and store the weather data
+        return self.process_weather_data(weather_data, city)
 
 
-    def fetch_weather_data_for_country(self, country, start_date, end_date):
+    def fetch_weather_data_for_city(self, city, start_date, end_date):
         """
-        Fetch weather data for a given country from the weather API.
+        Fetch weather data for a given city from the weather API.
 
         Parameters
         ----------
@@ -277,56 +615,60 @@ class LocationManager:
 
         Returns
         -------
-        WeatherData or None
-            The weather data for the city, or None if the data is invalid or fetching failed.
+        list[dict]
+            The daily weather rows for the city, or an empty list if the data is invalid or fetching failed.
         """
-        self.logger.debug(f"Fetching weather data for country: {country}, type: {type(country)}")
+        self.logger.debug("Fetching weather data for city: %s (Lat: %s, Lon: %s)", city.name, city.latitude, city.longitude)
         
-        weather_data = self.weather_service.fetch_weather_data_for_country(
+        weather_data = self.weather_service.fetch_weather_data(
             city.latitude, city.longitude, start_date, end_date, city.id
         )
 
-        self.logger.debug(f"location_manager, weather data type {type(weather_data)}")
+        if weather_data:
+            self._invalidate_annual_precipitation(city.country_id, weather_data)
 
         return weather_data
 
 
+    def _invalidate_annual_precipitation(self, country_id, weather_data):
+        """
+        Removes cached annual precipitation results affected by newly stored weather rows.
+
+        Parameters
+        ----------
+        country_id : int
+            The ID of the country the weather rows belong to.
+        weather_data : list[dict]
+            The weather rows that were stored.
+        """
+        for year in {row["date"].year for row in weather_data}:
+            self._annual_precip_cache.pop((country_id, year), None)
+
+
     def process_weather_data(self, weather_data, city):
         """
-        Processes the fetched weather data, maps it to `DailyWeatherEntry` objects, 
-        and stores it in the database.
+        Processes the fetched weather data. The rows are stored by the weather service
+        in batched inserts and a single commit when fetched, so no further writes are needed.
 
         Parameters
         ----------
-        weather_data : WeatherData
-            The fetched weather data to process.
+        weather_data : list[dict]
+            The fetched weather rows to process.
         city : City
             The city associated with the weather data.
 
         Returns
         -------
-        dict
+        list[dict]
             The processed weather data.
         """
-        self.logger.debug(f"Processing weather data for city {city}. len {len(weather_data)}")
-
-        try:
-            # Map weather data to DailyWeatherEntry objects
-            for data in weather_data:
-                # self.logger.debug(f"Mapping raw data for: {data} ")
-                self.db_session.add(data)
-
-            # Commit the transaction
-            self.db_session.commit()
-            self.logger.debug(f"Weather data successfully added to the database for city {city}.")
-        except ValueError as e:
-            self.logger.error(f"Error processing weather data for {city}: {str(e)}")
-            return {}
+        self.logger.debug("Processing weather data for city %s", city.name)
+        self.logger.debug("Weather data successfully added to the database for city %s.", city.name)
 
         return weather_data
 
 
-    def fetch_seven_day_precipitation(self, location_name, start_date):
+    def fetch_seven_day_precipitation(self, location_name, start_date, resolver=None):
         """
         Retrieves 7-day precipitation data from the database or fetches it from Open-Meteo if not found.
 
@@ -334,88 +676,46 @@ class LocationManager:
         ----------
         location_name : str
             The name of the city.
-        start_date : str
-            The start date of the 7-day period.
+        start_date : date
+            The start date of the 7-day period, as parsed by InputHandler.get_date.
+        resolver : callable, optional
+            Selects one of several geocoding results for a new city. The first result is used if None.
 
         Returns
         -------
         list
             A list of 7-day precipitation data or None if there is no data.
         """
-        # First, check if the precipitation data exists in the database
-        weather_data = []
-        city = self.get_city_from_db(location_name)
-        self.logger.debug(f"7 day dates, start {start_date}")
+        self.logger.debug("7 day dates, start %s", start_date)
 
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        mid_date = start_date + timedelta(days=6)
-        start_date = start_date.strftime("%Y-%m-%d")
-        end_date = mid_date.strftime("%Y-%m-%d")
+        end_date = start_date + timedelta(days=6)
 
-        # If the city is not found in the database, attempt to fetch weather data
+        city = self._resolve_or_create_city(location_name, resolver)
         if not city:
-            self.logger.warning(f"City '{location_name}' not found in the database. Fetching data from Open-Meteo.")
-
-            # Fetch city data from the Geocoding API (this returns a list of cities)
-            city_data_list = self.geocoding_service.fetch_city_data(city_name=location_name)
-            self.logger.debug(f"7 day precip, city_data_list {city_data_list}")
-
-            if city_data_list:
-                self.logger.debug(f"7 day precip, {city_data_list[0]}")
-                city_info = city_data_list[0]
-
-                # Ensure the city is now a City object
-                country = self.ensure_country_exists(location_name)
-                city = self.ensure_city_exists(
-                    city_info.name, city_info.latitude, city_info.longitude, country
-                )
-
-                self.logger.debug(f"Country information received: {country}, City data received: {city}")
-
-                # Now we pass the correct City object
-                weather_data = self.fetch_weather_data_for_city(
-                    city, start_date, end_date
-                )
-                self.logger.info(f"7 day precip, weather_data: {weather_data}")
-
-                # If Open-Meteo data is available, process and store it, then return
-                if weather_data:
-                    self.process_weather_data(weather_data, location_name)
-                    return weather_data
-                else:
-                    self.logger.error(f"No data available for {location_name} from Open-Meteo.")
-                    print(f"No data available for {location_name}. Returning to the menu...")
-                    return None  # Return to the menu or handle accordingly
-
-        self.logger.debug(f"City '{location_name}' found in the database.")
+            print(f"No data available for {location_name}. Returning to the menu...")
+            return None
 
         # Check if the 7-day precipitation data already exists in the database
-        existing_data = self.db_session.query(DailyWeatherEntry.precipitation).filter(
-            DailyWeatherEntry.city_id == city.id,
-            DailyWeatherEntry.date.between(start_date, end_date)
+        existing_data = self.db_session.execute(
+            STMT_PRECIP_FOR_PERIOD, {"city_id": city.id, "start_date": start_date, "end_date": end_date}
         ).all()
 
         if existing_data:
             # Return the existing data if available
-            self.logger.info(f"Returning existing precipitation data for {location_name}.")
+            self.logger.info("Returning existing precipitation data for %s.", location_name)
             return existing_data
 
-        # Process the data and save it to the database
+        # Fetch the data from Open-Meteo, then store and return it
+        weather_data = self.fetch_weather_data_for_city(city, start_date.isoformat(), end_date.isoformat())
+        self.logger.info("7 day precip, weather_data: %s", weather_data)
+
         if weather_data:
-            weather_data_obj = WeatherData(weather_data)
-
-            if weather_data_obj.is_valid():
-                daily_entries = weather_data_obj.map_to_daily_weather(city.id)
-                self.db_session.add_all(daily_entries)
-                self.db_session.commit_session()
-                self.logger.info(f"Successfully fetched and saved data for {location_name}.")
-                return daily_entries
-            else:
-                self.logger.error(f"Invalid weather data for {location_name}.")
-                return None
-        else:
-            self.logger.error(f"Failed to fetch weather data for {location_name}.")
-            return {}
+            self.process_weather_data(weather_data, city)
+            return weather_data
+
+        self.logger.error("No data available for %s from Open-Meteo.", location_name)
+        print(f"No data available for {location_name}. Returning to the menu...")
+        return None
 
     def average_annual_precipitation_by_country(self, country_name, year):
         """
@@ -434,90 +734,64 @@ class LocationManager:
             A dictionary containing the total annual precipitation and a breakdown by month.
         """
         # Retrieve the country
-        country = self.db_session.query(Country).filter(Country.name.ilike(country_name)).first()
+        country = self.get_country_from_db(country_name)
 
         if not country:
-            self.logger.debug(f"Country '{country_name}' not found in the database.")
+            self.logger.debug("Country '%s' not found in the database.", country_name)
             return None
 
-        # Define the start and end dates for the year
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31)
+        # Results only change when new weather rows are stored for this country and year
+        cache_key = (country.id, year)
+        if cache_key in self._annual_precip_cache:
+            self.logger.debug("Returning cached precipitation for %s in %s", country_name, year)
+            return self._annual_precip_cache[cache_key]
 
-        self.logger.debug(f"Received country: {country.name}, start_date: {start_date}, end_date: {end_date})")
+        self.logger.debug("Received country: %s, year: %s", country.name, year)
 
-        # Query for monthly precipitation totals per city in the country
-        monthly_precip = (
-            self.db_session.query(
-                func.extract('month', DailyWeatherEntry.date).label('month'),
-                func.sum(DailyWeatherEntry.precipitation).label('monthly_precip')
-            )
-            .join(City, City.id == DailyWeatherEntry.city_id)
-            .join(Country, Country.id == City.country_id)
-            .filter(Country.id == country.id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .group_by('month')
-            .order_by('month')
-            .all()
+        # Monthly precipitation totals across the country's cities, from the monthly roll-up
+        monthly_precip = self.db_session.execute(
+            STMT_MONTHLY_PRECIP_BY_COUNTRY, {"country_id": country.id, "year": year}
         )
 
-        self.logger.debug(f"by country, monthly_precip: {monthly_precip}")
-
-        # Aggregate the data into a dictionary for monthly precipitation
-        monthly_data = {month: round(precip, 2) for month, precip in monthly_precip}
-        self.logger.debug(f"by country, monthly_data zipped: {monthly_data}")
-
-        # Query for total precipitation for the year
-        total_precip = (
-            self.db_session.query(func.sum(DailyWeatherEntry.precipitation))
-            .join(City, City.id == DailyWeatherEntry.city_id)
-            .join(Country, Country.id == City.country_id)
-            .filter(Country.id == country.id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .scalar()
-        )
+        # Aggregate the monthly breakdown and the annual total in a single pass
+        monthly_data = {}
+        total_precip = 0
+        for month, precip in monthly_precip:
+            monthly_data[month] = round(precip, 2)
+            total_precip += precip
+        self.logger.debug("by country, monthly_data zipped: %s", monthly_data)
 
-        self.logger.debug(f"by country, total_precip: {total_precip}")
+        total_precip = round(total_precip, 2)
 
-        total_precip = round(total_precip, 2) if total_precip is not None else 0
-
-        self.logger.debug(f"Total precipitation for {country_name} in {year}: {total_precip} mm")
+        self.logger.debug("Total precipitation for %s in %s: %s mm", country_name, year, total_precip)
 
         # Return both the total annual precipitation and the monthly breakdown
-        return {
+        result = {
             'total_precipitation': total_precip,
             'monthly_precipitation': monthly_data
         }
+        self._annual_precip_cache[cache_key] = result
+        return result
 
 
-    def average_temp_by_city(self, start_date, end_date, location_name):
-        self.logger.debug(f"loc man, average_temp_by_city")
+    def average_temp_by_city(self, start_date, end_date, location_name, resolver=None):
+        self.logger.debug("loc man, average_temp_by_city")
 
-        # Get the city object from the database using the location_name
-        city = self.get_city_from_db(location_name)
+        # Get the city object from the database, or fetch it from the Open-Meteo API
+        city = self._resolve_or_create_city(location_name, resolver)
         if not city:
-            self.logger.error(f"City '{city}' not found in the database.")
-            city_data = self.geocoding_service.fetch_city_data(location_name)
-
-            if not city_data:
-                self.logger.error(f"City '{location_name}' could not be fetched from Open-Meteo API.")
-                return {}
-
-            # Once the city data is fetched, ensure it is added to the database
-            self.logger.debug(f"Adding city '{location_name}' to the database.")
-            city = city_data[0]
-            self.session_manager.commit_session()
+            return {}
 
         # Log the city details and fetch weather data
-        self.logger.error(f"City '{city}' found in the database.")
+        self.logger.error("City '%s' found in the database.", city)
         weather_data = self.fetch_weather_data_for_city(city, start_date, end_date)
 
-        self.logger.debug(f"Weather data: {weather_data}")
+        self.logger.debug("Weather data: %s", weather_data)
 
         # Calculate and return the average temperature
         if weather_data:
-            average_temp = sum(entry.mean_temp for entry in weather_data) / len(weather_data)
+            average_temp = fmean(entry["mean_temp"] for entry in weather_data)
             return average_temp
         else:
-            self.logger.error(f"No weather data available for city '{city.name}' within the specified range.")
+            self.logger.error("No weather data available for city '%s' within the specified range.", city.name)
             return {}
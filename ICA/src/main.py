@@ -8,18 +8,20 @@ This module initializes and runs the WeatherDataApplication.
 # Student ID: <S6310391>
 
 import logging
-from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor, wait
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import StaticPool
 from os.path import abspath
 from initialise_db import initialise_db
 from session_manager import SessionManager
 from output_handler_registry import OutputHandlerRegistry
-from console_output_handler import ConsoleOutputHandler
-from graph_output_handler import GraphOutputHandler
 from weather_api_service import WeatherApiService
 from sqlite_query import SQLiteQuery
 from menu_handler import MenuHandler
 from database_manager import DatabaseManager
+from constants import DB_PATH, MENU_EXIT
 
 # TODO: Write tests for docstrings
 # TODO: Write some integration tests
@@ -38,23 +40,61 @@ from database_manager import DatabaseManager
 # TODO: requirements.txt
 # TODO: readme
 
-# Register handlers dynamically
-OutputHandlerRegistry.register_handler("console", ConsoleOutputHandler.handle_console)
-OutputHandlerRegistry.register_handler("bar_chart", GraphOutputHandler.handle_graph)
-OutputHandlerRegistry.register_handler("pie_chart", GraphOutputHandler.handle_graph)
+# Console output is written by OutputHandler itself; only the charts go through the registry.
+# Handlers register themselves with @OutputHandlerRegistry.register when their module is imported.
+# Chart handlers import matplotlib, so their module is only loaded when a chart is first requested.
+# Registration only sets dict entries, so re-importing this module repeats no work worth guarding
+OutputHandlerRegistry.register_lazy_handler("bar_chart", "graph_output_handler", "GraphOutputHandler.handle_graph")
+OutputHandlerRegistry.register_lazy_handler("pie_chart", "graph_output_handler", "GraphOutputHandler.handle_graph")
 # OutputHandlerRegistry.register_handler("scatter_plot", GraphOutputHandler.plot_scatter)
 # OutputHandlerRegistry.register_handler("line_chart", GraphOutputHandler.plot_line)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler()  # Output to console
-    ]
-)
 logger = logging.getLogger(__name__)
-logging.getLogger('matplotlib').setLevel(logging.INFO)
+
+
+def configure_logging():
+    """
+    Configure console logging for the application. Called when run as a script rather than
+    on import, and skipped if logging is already configured, so importing this module (e.g.
+    from tests) never attaches a second handler that would emit every record twice.
+    """
+    if logging.getLogger().hasHandlers():
+        return
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.StreamHandler()  # Output to console
+        ]
+    )
+    logging.getLogger('matplotlib').setLevel(logging.INFO)
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection for the application's read-heavy workload.
+
+    WAL journaling with synchronous=NORMAL avoids an fsync on every commit, and the
+    larger page cache, in-memory temp storage and memory-mapped I/O serve repeated
+    queries from memory.
+
+    Parameters
+    ----------
+    dbapi_connection : sqlite3.Connection
+        The newly opened DBAPI connection.
+    connection_record : ConnectionRecord
+        The pool's record for the connection (unused).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.executescript(
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA mmap_size=268435456;"
+    )
+    cursor.close()
 
 class WeatherDataApplication:
     """
@@ -75,24 +115,53 @@ class WeatherDataApplication:
         db_path : str
             The path to the SQLite database file.
         """
-        self.logger = logging.getLogger(self.__class__.__name__)
-
         # Initialize SQLAlchemy engine and session
         print(f"main db_path: {db_path}")
-        engine = create_engine(f"sqlite:///{db_path}")
-        session_factory = sessionmaker(bind=engine)
+        # One connection shared by the whole application; API worker threads never touch it
+        engine = create_engine(
+            f"sqlite:///{db_path}",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False}
+        )
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        # Objects stay usable after commit without re-selecting their attributes, and queries
+        # don't flush first; call session.refresh() where fresh data is needed after a commit
+        session_factory = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
         self.session_manager = SessionManager(session_factory)
 
-        # Initialize the database schema
-        initialise_db(db_path)
-
-        # Initialize other components
-        self.db_manager = DatabaseManager(engine)
+        # Initialize other components, all on the one engine connection
+        self.db_manager = DatabaseManager(engine, session_factory)
         self.query_instance = SQLiteQuery(self.session_manager.get_session())
         self.menu_handler = MenuHandler(self.query_instance, self.db_manager, self.session_manager)
         self.weather_service = WeatherApiService(session=self.session_manager.get_session())
 
-        self.logger.info("WeatherDataApplication initialised")
+        # Check/initialize the database schema and load the reference data in the background while
+        # the menu is shown. The future also guards the shared connection: the main thread only
+        # uses it once the future is done, so the two threads never use it at the same time
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._db_ready = executor.submit(self._prepare_database, db_path, engine)
+        executor.shutdown(wait=False)
+
+        logger.info("WeatherDataApplication initialised")
+
+    def _prepare_database(self, db_path, engine):
+        """
+        Initialize the database schema, then preload the country and city lists.
+
+        Parameters
+        ----------
+        db_path : str
+            The path to the SQLite database file.
+        engine : Engine
+            The application's engine.
+        """
+        initialise_db(db_path, engine)
+        try:
+            self.query_instance.preload_reference_data()
+        except SQLAlchemyError as e:
+            # Not fatal: the lists are loaded on first use instead
+            logger.warning("Could not preload reference data: %s", e)
+            self.session_manager.get_session().rollback()
 
     def run(self):
         """
@@ -101,20 +170,46 @@ class WeatherDataApplication:
         """
         while True:
             choice = self.menu_handler.display_main_menu()
+            if choice == MENU_EXIT:
+                print("Exiting the application...")
+                break
+
+            if not self._wait_for_database():
+                break
 
             try:
-                if not self.menu_handler.handle_menu_choice(choice):
-                    print("Exiting the application...")
-                    break
-            except Exception as e:
-                self.logger.error(f"An error occurred: {e}")
+                self.menu_handler.handle_menu_choice(choice)
+            except Exception:
+                # Roll back whatever the failed action left pending, so the shared session stays usable
+                self.session_manager.get_session().rollback()
+                # Logs the traceback as well, formatted only if the record is emitted
+                logger.exception("An error occurred, returning to the main menu")
                 print("An unexpected error occurred. Please try again.")
 
+        # Initialisation may still be running on the shared connection if the user exits straight away
+        wait([self._db_ready])
         # Close session on exit
         self.session_manager.close_session()
 
+    def _wait_for_database(self):
+        """
+        Wait for the background database initialisation to finish.
+
+        Returns
+        -------
+        bool
+            True if the database is ready. If initialisation failed the error is
+            reported and False is returned, so the application can exit.
+        """
+        try:
+            self._db_ready.result()
+            return True
+        except Exception:
+            logger.exception("Database initialisation failed")
+            print("The database could not be initialised. Exiting the application...")
+            return False
+
 if __name__ == "__main__":
-    # Initialize database path
-    DB_PATH = "db\\CIS4044-N-SDI-OPENMETEO-PARTIAL.db"
+    configure_logging()
     app = WeatherDataApplication(DB_PATH)
     app.run()
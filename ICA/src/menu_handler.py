@@ -4,19 +4,51 @@ Menu Handler
 Manages the user menu system for the Weather Data Application.
 """
 import logging
+import os
+import sys
+from functools import partial
 from input_handler import InputHandler
-from location_manager import LocationManager
 from output_handler import OutputHandler
-from console_output_handler import ConsoleOutputHandler
 from session_manager import SessionManager
-from geocoding_api_service import GeocodingApiService
 from constants import *
 
+# The menus are plain ASCII, so they are encoded once here rather than on every redraw
+_MAIN_MENU_BYTES = MAIN_MENU_TEXT.encode("ascii")
+_DISPLAY_MENU_BYTES = DISPLAY_MENU_TEXT.encode("ascii")
+
+
+def _write_menu(menu_bytes, menu_text):
+    """
+    Write a pre-encoded menu straight to the stdout file descriptor.
+
+    Parameters
+    ----------
+    menu_bytes : bytes
+        The encoded menu.
+    menu_text : str
+        The same menu as text, written through sys.stdout if stdout has no usable file descriptor.
+    """
+    # Anything print() has buffered must go out first to keep the output in order
+    sys.stdout.flush()
+    try:
+        os.write(sys.stdout.fileno(), menu_bytes)
+    except (OSError, ValueError):
+        sys.stdout.write(menu_text)
+
 class MenuHandler:
     """
     Handles menu display and user choice delegation.
     """
 
+    # Menu options that list a whole table: SQLiteQuery method, title, x label, y label
+    _VIEW_ALL_ENTRIES = {
+        MENU_VIEW_COUNTRIES: ("get_all_countries", TITLE_COUNTRIES, X_LABEL_COUNTRIES, Y_LABEL_COUNTRY_ID),
+        MENU_VIEW_CITIES: ("get_all_cities", TITLE_CITIES, X_LABEL_CITIES, Y_LABEL_CITY_ID),
+    }
+
+    # Display options listed in DISPLAY_MENU_TEXT
+    _DISPLAY_CHOICES = frozenset({DISPLAY_CONSOLE, DISPLAY_BAR_CHART, DISPLAY_PIE_CHART})
+
     def __init__(self, query_instance, db_manager, session_manager: SessionManager):
         """
         Initialize the MenuHandler.
@@ -34,8 +66,43 @@ class MenuHandler:
         self.query_instance = query_instance
         self.db_manager = db_manager
         self.session_manager = session_manager
-        self.geocoding_service = GeocodingApiService(self.session_manager)
-        self.location_manager = LocationManager(self.session_manager, self.geocoding_service)
+        # Built on first use, so the "view all" options and startup don't pay for the API clients
+        self._geocoding_service = None
+        self._location_manager = None
+
+        # Menu option -> action, looked up once per choice instead of walking an if/elif chain
+        self._dispatch = {
+            MENU_VIEW_COUNTRIES: self.view_countries,
+            MENU_VIEW_CITIES: self.view_cities,
+            MENU_AVG_TEMP: self.average_annual_temperature,
+            MENU_7DAY_PRECIP: self.average_seven_day_precipitation,
+            MENU_MEAN_TEMP_CITY: self.average_temp_by_city,
+            MENU_ANNUAL_PRECIP_CITY: self.average_annual_precipitation_by_country,
+        }
+
+
+    @property
+    def geocoding_service(self):
+        """
+        The GeocodingApiService, created on first access.
+        """
+        if self._geocoding_service is None:
+            from geocoding_api_service import GeocodingApiService
+            self._geocoding_service = GeocodingApiService(self.session_manager)
+        return self._geocoding_service
+
+
+    @property
+    def location_manager(self):
+        """
+        The LocationManager, created on first access.
+        """
+        if self._location_manager is None:
+            from location_manager import LocationManager
+            self._location_manager = LocationManager(self.session_manager, self.geocoding_service)
+            # Connect to the Geocoding API while the first lookup checks the database
+            self.geocoding_service.prewarm()
+        return self._location_manager
 
 
     def display_main_menu(self):
@@ -47,14 +114,7 @@ class MenuHandler:
         int
             The user's menu choice.
         """
-        print("\nWeather Data Application")
-        print("1. View all countries")
-        print("2. View all cities")
-        print("3. Get average annual temperature")
-        print("4. Get seven-day precipitation")
-        print("5. Get mean temperature by city")
-        print("6. Get annual precipitation by country")
-        print("0. Exit")
+        _write_menu(_MAIN_MENU_BYTES, MAIN_MENU_TEXT)
         return InputHandler.get_integer_input("Enter your choice: ")
 
 
@@ -66,65 +126,84 @@ class MenuHandler:
         ----------
         choice : int
             The user's menu choice.
+
+        Returns
+        -------
+        bool
+            False if the user chose to exit, otherwise True.
         """
-        if choice == MENU_VIEW_COUNTRIES:
-            self.view_countries()
-        elif choice == MENU_VIEW_CITIES:
-            self.view_cities()
-        elif choice == MENU_AVG_TEMP:
-            self.average_annual_temperature()
-        elif choice == MENU_7DAY_PRECIP:
-            self.average_seven_day_precipitation()
-        elif choice == MENU_MEAN_TEMP_CITY:
-            self.average_temp_by_city()
-        elif choice == MENU_ANNUAL_PRECIP_CITY:
-            self.average_annual_precipitation_by_country()
-        elif choice == MENU_EXIT:
+        if choice == MENU_EXIT:
             return False
-        else:
+
+        action = self._dispatch.get(choice)
+        if action is None:
             print("Invalid choice, try again")
+        else:
+            action()
         return True
 
 
+    def view_all(self, choice):
+        """
+        Fetch and display every row of the table behind a "view all" menu option.
+
+        Parameters
+        ----------
+        choice : int
+            The menu option, a key of _VIEW_ALL_ENTRIES.
+        """
+        query_name, title, xlabel, ylabel = self._VIEW_ALL_ENTRIES[choice]
+        results = getattr(self.query_instance, query_name)()
+        OutputHandler.handle_output(DISPLAY_CONSOLE, results, title, xlabel, ylabel)
+
+
     def view_countries(self):
         """
         Fetch and display all countries from the database.
         """
-        results = self.query_instance.get_all_countries()
-        OutputHandler.handle_output(1, results, TITLE_COUNTRIES, X_LABEL_COUNTRIES, Y_LABEL_COUNTRY_ID)
+        self.view_all(MENU_VIEW_COUNTRIES)
 
 
     def view_cities(self):
         """
         Fetch and display all cities from the database.
         """
-        results = self.query_instance.get_all_cities()
-        OutputHandler.handle_output(1, results, TITLE_CITIES, X_LABEL_COUNTRIES, Y_LABEL_COUNTRY_ID)
+        self.view_all(MENU_VIEW_CITIES)
 
 
     def average_annual_temperature(self):
         """
         Retrieve and display the average annual temperature for a city in a given year.
         """
-        location_name = input("Enter location name: ")
+        location_name = input("Enter location name: ").strip()
         if not location_name:
             print("Location name cannot be empty. Please enter a valid city name.")
             return
         year = InputHandler.get_year_input("Enter year as YYYY: ")
 
-        start_date = f"{year}{START_OF_YEAR}"
-        end_date = f"{year}{END_OF_YEAR}"
-        self.session_manager.log_session_details()
+        # get_year_input returns the year as a four-digit string, so the dates are plain concatenations
+        start_date = year + START_OF_YEAR
+        end_date = year + END_OF_YEAR
 
-        city_data = self.location_manager.ensure_location_in_database(location_name)
-        self.session_manager.log_session_details()
+        city = self.location_manager.ensure_location_in_database(location_name, self._location_resolver(location_name))
 
-        weather_data = self.location_manager.fetch_location_weather_data(city_data, start_date, end_date)
-        self.logger.debug(f"menu_handler, weather data: {weather_data[:5]}")
+        if city is None:
+            print(f"No data available for {location_name}. Returning to the menu...")
+            return
+
+        # The averages are read from the database, so the API is only called for a year with days missing
+        if self.query_instance.has_weather_for_period(city.id, start_date, end_date):
+            self.logger.debug("menu_handler, weather for %s in %s already stored", city.name, year)
+        else:
+            weather_data = self.location_manager.fetch_location_weather_data(city, start_date, end_date)
+            self.logger.debug("menu_handler, weather rows fetched: %s", len(weather_data))
 
-        monthly_data = self.query_instance.get_monthly_average_temperature(weather_data)
-        self.logger.debug(f"menu_handler, monthly data: {monthly_data} type: {type(monthly_data)}")
+        # The fetched rows are stored with their monthly roll-up, so both averages come back in one query
+        annual_avg, monthly_data = self.query_instance.get_temperature_report(city.id, year)
+        self.logger.debug("menu_handler, monthly data: %s type: %s", monthly_data, type(monthly_data))
 
+        if annual_avg is not None:
+            print(f"Average temperature for {city.name} in {year}: {annual_avg:.2f} °C")
         self.delegate_output(monthly_data, title=TITLE_AVG_TEMP, xlabel=X_LABEL_YEAR, ylabel=Y_LABEL_TEMPERATURE)
 
 
@@ -132,16 +211,18 @@ class MenuHandler:
         """
         Retrieve and display the average precipitation over a seven-day period for a city.
         """
-        location_name = input("Enter location name: ")
+        location_name = input("Enter location name: ").strip()
         if not location_name:
             print("Location name cannot be empty. Please enter a valid city name.")
             return
 
-        start_date = InputHandler.get_date_input("Enter start date (yyyy-mm-dd): ")
-        self.logger.debug(f"avg 7 day precip start_date: {start_date}")
+        start_date = InputHandler.get_date("Enter start date (yyyy-mm-dd): ")
+        self.logger.debug("avg 7 day precip start_date: %s", start_date)
 
-        results = self.location_manager.fetch_seven_day_precipitation(location_name, start_date)
-        self.logger.debug(f"avg 7 day precip type: {type(results)}, {results}")
+        results = self.location_manager.fetch_seven_day_precipitation(
+            location_name, start_date, self._location_resolver(location_name)
+        )
+        self.logger.debug("avg 7 day precip type: %s, %s", type(results), results)
 
         # Display the results
         self.delegate_output(results, title=TITLE_7DAY_PRECIP, xlabel=X_LABEL_CITIES, ylabel=Y_LABEL_PRECIPITATION)
@@ -151,7 +232,7 @@ class MenuHandler:
         """
         Retrieve and display the mean temperature for a city over a specified date range.
         """
-        location_name = input("Enter location name: ")
+        location_name = input("Enter location name: ").strip()
         
         if not location_name:
             print("Location name cannot be empty. Please enter a valid city name.")
@@ -160,7 +241,9 @@ class MenuHandler:
         date_from = InputHandler.get_date_input("Enter start date (format: yyyy-mm-dd): ")
         date_to = InputHandler.get_date_input("Enter end date (format: yyyy-mm-dd): ")
 
-        results = self.location_manager.average_temp_by_city(date_from, date_to, location_name)
+        results = self.location_manager.average_temp_by_city(
+            date_from, date_to, location_name, self._location_resolver(location_name)
+        )
         self.delegate_output(results, title=TITLE_MEAN_TEMP_CITY, xlabel=X_LABEL_TEMPERATURE, ylabel=Y_LABEL_TEMPERATURE)
 
 
@@ -170,26 +253,26 @@ class MenuHandler:
         Uses the LocationManager for fetching data.
         """
         year = InputHandler.get_year_input("Enter year as YYYY: ")
-        location_name = input("Enter location name: ")
+        location_name = input("Enter location name: ").strip()
 
         if not location_name:
             print("Location name cannot be empty. Please enter a valid city name.")
             return
 
         # Ensure the location exists and fetch weather data
-        country = self.location_manager.ensure_location_in_database(location_name)
+        country = self.location_manager.ensure_location_in_database(location_name, self._location_resolver(location_name))
 
         if not country:
-            print(f"City '{country}' not found in the database.")
+            print(f"City '{location_name}' not found in the database.")
             return
         else:
-            self.logger.debug(f"Found city: {type(country)}, year: {type(year)}, {country}")
+            self.logger.debug("Found city: %s, year: %s, %s", type(country), type(year), country)
 
 
         # Fetch the annual and monthly precipitation data
         year = int(year)
         results = self.location_manager.average_annual_precipitation_by_country(location_name, year)
-        self.logger.debug(f"results of type: {type(results)}, {results}")
+        self.logger.debug("results of type: %s, %s", type(results), results)
 
         if results:
             self.delegate_output(results, title=TITLE_ANNUAL_PRECIP, xlabel=X_LABEL_PRECIPITATION, ylabel=Y_LABEL_PRECIPITATION)
@@ -197,6 +280,23 @@ class MenuHandler:
             print("No precipitation data available for this country and year.")
 
 
+    def _location_resolver(self, location_name):
+        """
+        Build a resolver that prompts the user to choose between several geocoding matches.
+
+        Parameters
+        ----------
+        location_name : str
+            The location name the user entered.
+
+        Returns
+        -------
+        callable
+            A resolver for LocationManager that takes the list of matches and returns the chosen one.
+        """
+        return partial(self.geocoding_service.choose_city, location_name)
+
+
     def delegate_output(self, results, title, xlabel, ylabel):
         """
         Display query results using the OutputHandler.
@@ -212,16 +312,22 @@ class MenuHandler:
         ylabel : str
             Label for the y-axis (if applicable).
         """
-        self.logger.debug(f"delegating output")
-        print("How would you like to display the data?")
-        print("1. Console")
-        print("2. Bar Chart")
-        print("3. Pie Chart")
+        self.logger.debug("delegating output")
+        # Nothing to display, so don't ask how to display it
+        if not OutputHandler.has_data(results):
+            print("No data available.")
+            return
+
+        _write_menu(_DISPLAY_MENU_BYTES, DISPLAY_MENU_TEXT)
         choice = InputHandler.get_integer_input("Enter your choice: ")
+        # Re-prompt here rather than let an unsupported choice fail inside the output handler
+        while choice not in self._DISPLAY_CHOICES:
+            print("Invalid choice. Please enter 1, 2 or 3.")
+            choice = InputHandler.get_integer_input("Enter your choice: ")
 
-        self.logger.debug(f"User selected display option: {choice}")
-        self.logger.debug(f"Graph details: {title, xlabel, ylabel}")
-        self.logger.debug(f"Results being passed: {results}")
+        self.logger.debug("User selected display option: %s", choice)
+        self.logger.debug("Graph details: %s", (title, xlabel, ylabel))
+        self.logger.debug("Results being passed: %s", results)
 
         OutputHandler.handle_output(choice, results, title, xlabel, ylabel)
 
@@ -231,4 +337,6 @@ class MenuHandler:
             Close the application and the database connection.
             """
             print("Closing application")
+            if self._location_manager is not None:
+                self._location_manager.close()
             self.db_manager.close_connection()
@@ -4,4 +4,6 @@ Base = declarative_base()
 
 from .city import City
 from .country import Country
-from .daily_weather_entry import DailyWeatherEntry
\ No newline at end of file
+from .daily_weather_entry import DailyWeatherEntry
+from .monthly_weather_summary import MonthlyWeatherSummary
+from .location_alias import LocationAlias
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from . import Base
 
@@ -12,6 +12,13 @@ class City(Base):
     timezone = Column(String, nullable=False)
     country_id = Column(Integer, ForeignKey('countries.id'), nullable=False)
 
+    # Case-insensitive name lookups (not unique, as the shipped data holds duplicate city names),
+    # and the joins from a country to its cities
+    __table_args__ = (
+        Index("ix_city_name_lower", func.lower(name)),
+        Index("ix_city_country_id", country_id),
+    )
+
     # Relationship to Country model
     country = relationship("Country", back_populates="cities")
     weather_entries = relationship('DailyWeatherEntry', back_populates='city', cascade="all, delete-orphan")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index, func
 from sqlalchemy.orm import relationship
 from . import Base
 
@@ -9,6 +9,9 @@ class Country(Base):
     name = Column(String, nullable=False)
     timezone = Column(String, nullable=False)
 
+    # Case-insensitive name lookups; unique so new countries can be added with INSERT OR IGNORE
+    __table_args__ = (Index("ux_country_name_lower", func.lower(name), unique=True),)
+
     cities = relationship("City", back_populates="country")
 
     def to_dict(self):
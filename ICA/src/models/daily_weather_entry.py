@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from . import Base
 
@@ -13,6 +13,9 @@ class DailyWeatherEntry(Base):
     precipitation = Column(Float, nullable=False)
     city_id = Column(Integer, ForeignKey('cities.id'), nullable=False)
 
+    # Weather lookups filter by city and a date range, which this index answers with a seek
+    __table_args__ = (Index("ix_daily_city_date", city_id, date),)
+
     city = relationship("City", back_populates="weather_entries")
 
     def to_dict(self):
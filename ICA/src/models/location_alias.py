@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from . import Base
+
+class LocationAlias(Base):
+    """
+    A location name as the user typed it, normalised with strip().lower(), mapped to the
+    city the Geocoding API resolved it to, so the same search is not sent to the API again.
+    """
+    __tablename__ = 'location_aliases'
+
+    name = Column(String, primary_key=True)
+    city_id = Column(Integer, ForeignKey('cities.id'), nullable=False)
+
+    def __repr__(self):
+        return f"LocationAlias(name='{self.name}', city_id={self.city_id})"
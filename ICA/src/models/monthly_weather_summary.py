@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, cast, func, insert, select
+from . import Base
+from .daily_weather_entry import DailyWeatherEntry
+
+_YEAR = cast(func.strftime('%Y', DailyWeatherEntry.date), Integer)
+_MONTH = cast(func.strftime('%m', DailyWeatherEntry.date), Integer)
+
+class MonthlyWeatherSummary(Base):
+    """
+    Roll-up of daily_weather_entries per city and month, so yearly and monthly aggregates
+    read at most twelve rows per city instead of every daily row.
+    """
+    __tablename__ = 'monthly_weather_summaries'
+
+    city_id = Column(Integer, ForeignKey('cities.id'), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    precipitation = Column(Float, nullable=False)
+    # Sum and count of the non-null mean temperatures, so averages over several months stay exact
+    mean_temp_total = Column(Float)
+    mean_temp_days = Column(Integer, nullable=False)
+    days = Column(Integer, nullable=False)
+
+    @classmethod
+    def refresh_statement(cls, *criteria):
+        """
+        Build an INSERT OR REPLACE that recomputes the summaries from the daily rows.
+
+        Parameters
+        ----------
+        *criteria : ColumnElement
+            Filters on DailyWeatherEntry selecting the rows to summarise. Every month that is
+            refreshed must be covered in full. All rows are summarised if none are given.
+
+        Returns
+        -------
+        Insert
+            The statement to execute.
+        """
+        summary = (
+            select(
+                DailyWeatherEntry.city_id,
+                _YEAR,
+                _MONTH,
+                func.sum(DailyWeatherEntry.precipitation),
+                func.sum(DailyWeatherEntry.mean_temp),
+                func.count(DailyWeatherEntry.mean_temp),
+                func.count(),
+            )
+            .where(*criteria)
+            .group_by(DailyWeatherEntry.city_id, _YEAR, _MONTH)
+        )
+        return insert(cls).prefix_with("OR REPLACE").from_select(
+            ["city_id", "year", "month", "precipitation", "mean_temp_total", "mean_temp_days", "days"],
+            summary,
+        )
+
+    def __repr__(self):
+        return (f"MonthlyWeatherSummary(city_id={self.city_id}, year={self.year}, month={self.month}, "
+                f"precipitation={self.precipitation}, days={self.days})")
@@ -1,4 +1,6 @@
 import logging
+import sys
+from operator import itemgetter
 from datetime import datetime, date, timedelta
 from models.city import City
 from models.country import Country
@@ -7,12 +9,25 @@ from output_handler_registry import OutputHandlerRegistry
 from sqlalchemy.engine.row import Row
 from constants import *
 
+# Pull a row's label and value out together, so each chart path walks the results once
+_DATE_AND_PRECIPITATION = itemgetter('date', 'precipitation')
+_MONTH_AND_TEMPERATURE = itemgetter('Month', 'Temperature')
+
 class OutputHandler:
     """
     Provides methods to display results in the console.
     """
     logger = logging.getLogger(__name__)
 
+    # Columns shown as whole numbers in the generic console table
+    _INTEGER_COLUMNS = frozenset({"id", "country_id"})
+
+    # Registry names of the chart handlers, by display choice
+    _CHART_HANDLERS = {
+        DISPLAY_BAR_CHART: "bar_chart",
+        DISPLAY_PIE_CHART: "pie_chart",
+    }
+
     @staticmethod
     def handle_output(choice, results, title=None, xlabel=None, ylabel=None):
         """
@@ -31,15 +46,19 @@ class OutputHandler:
             The y-axis label for graphical outputs.
         """
         OutputHandler.logger.debug("handle_output called with choice=%s, title=%s", choice, title)
-        OutputHandler.logger.debug("Raw results (before standardise): %r", results)
 
-        if not results:
+        # A single number on the console needs no standardising, labels or handler lookup
+        if isinstance(results, (int, float)) and choice == DISPLAY_CONSOLE:
+            OutputHandler._print_scalar(results)
+            return
+
+        if not OutputHandler.has_data(results):
             print("No data available.")
             OutputHandler.logger.warning("No data available.")
             return
 
         results = OutputHandler._standardise_results(results, title)
-        OutputHandler.logger.debug("Results after _standardise_results: type=%s, value=%r", type(results), results)
+        OutputHandler.logger.debug("Results after _standardise_results: type=%s", type(results))
 
         if not isinstance(results, list):
             OutputHandler.logger.debug("Results is not a list; falling back to console output.")
@@ -47,28 +66,27 @@ class OutputHandler:
             OutputHandler._display_table(results)
             return
 
+        # Console output needs neither chart labels nor a registry lookup
+        if choice == DISPLAY_CONSOLE:
+            OutputHandler.logger.debug("User chose console output.")
+            OutputHandler._display_table(results)
+            return
+
         ### ADDED LOGGING ###
         OutputHandler.logger.debug("About to extract labels/values from results.")
         labels, values = OutputHandler._extract_labels_values_for_cities_and_countries(results)
-        OutputHandler.logger.debug("After _extract_labels_values_for_cities_and_countries:")
-        OutputHandler.logger.debug("   labels=%r", labels)
-        OutputHandler.logger.debug("   values=%r", values)
-
-        handlers = {
-            1: "console",
-            2: "bar_chart",
-            3: "pie_chart"
-        }
-        handler_name = handlers.get(choice)
+        # Dumping every label and value is only worth doing when debug output is on
+        if OutputHandler.logger.isEnabledFor(logging.DEBUG):
+            OutputHandler.logger.debug("After _extract_labels_values_for_cities_and_countries:")
+            OutputHandler.logger.debug("   labels=%r", labels)
+            OutputHandler.logger.debug("   values=%r", values)
+
+        handler_name = OutputHandler._CHART_HANDLERS.get(choice)
         handler = OutputHandlerRegistry.get_handler(handler_name)
 
         try:
-            if handler_name == "console":
-                OutputHandler.logger.debug("User chose console output.")
-                OutputHandler._display_table(results)
-            elif handler:
+            if handler:
                 OutputHandler.logger.debug("User chose graph output. Handler=%s", handler_name)
-                OutputHandler.logger.debug("Graphing with labels: %r and values: %r", labels, values)
                 handler(choice, labels, values, title, xlabel, ylabel)
             else:
                 raise ValueError(f"Unsupported output type: {handler_name}")
@@ -81,6 +99,38 @@ class OutputHandler:
             print("Falling back to console output.")
             OutputHandler._display_table(results)
 
+    @staticmethod
+    def _print_scalar(value):
+        """
+        Print a single numeric result as a one-column "Result" table, as the generic table would.
+
+        Parameters
+        ----------
+        value : int or float
+            The value to display, to 2 decimal places.
+        """
+        text = f"{value:.2f}"
+        width = max(len("Result"), len(text))
+        OutputHandler._write_lines(["", f"{'Result':<{width}}", "-" * width, f"{text:<{width}}"])
+
+    @staticmethod
+    def has_data(results):
+        """
+        Check whether a query result has anything to display.
+
+        Parameters
+        ----------
+        results : list, dict, int, float or None
+            The query result.
+
+        Returns
+        -------
+        bool
+            False for None or an empty collection, otherwise True. Scalars are checked
+            directly rather than by truthiness, so a result of 0.0 still counts as data.
+        """
+        return results is not None and not (hasattr(results, "__len__") and len(results) == 0)
+
     @staticmethod
     def _extract_labels_values_for_cities_and_countries(results):
         """
@@ -95,8 +145,9 @@ class OutputHandler:
             A tuple containing labels (x-axis) and values (y-axis) for charts.
         """
         ### ADDED LOGGING ###
-        OutputHandler.logger.debug("_extract_labels_values_for_cities_and_countries called.")
-        OutputHandler.logger.debug("Incoming results type=%s, length=%d", type(results), len(results) if results else 0)
+        if OutputHandler.logger.isEnabledFor(logging.DEBUG):
+            OutputHandler.logger.debug("_extract_labels_values_for_cities_and_countries called.")
+            OutputHandler.logger.debug("Incoming results type=%s, length=%d", type(results), len(results) if results else 0)
 
         # Handle empty results
         if not results or not isinstance(results[0], dict):
@@ -106,9 +157,8 @@ class OutputHandler:
         # 1) If we have daily precipitation data
         if 'date' in results[0] and 'precipitation' in results[0]:
             OutputHandler.logger.debug("Detected 'date' and 'precipitation' in results[0], daily data path.")
-            labels = [str(row['date']) for row in results]
-            values = [row['precipitation'] for row in results]
-            return labels, values
+            dates, values = zip(*map(_DATE_AND_PRECIPITATION, results))
+            return list(map(str, dates)), list(values)
 
         # 2) Start with empty defaults
         labels = []
@@ -117,9 +167,9 @@ class OutputHandler:
         # 3) If monthly data
         if "Month" in results[0]:
             OutputHandler.logger.debug("Detected 'Month' in results[0], monthly data path.")
-            values = [row["Temperature"] for row in results]
-            labels = OutputHandler._generate_time_period_labels(results)
-            OutputHandler.logger.debug("Monthly data assigned labels=%r, values=%r", labels, values)
+            months, values = zip(*map(_MONTH_AND_TEMPERATURE, results))
+            labels = [MONTH_NAMES[month - 1] for month in months]
+            values = list(values)
 
         # 4) If STILL empty, fallback to generic approach
         if not labels:
@@ -129,9 +179,6 @@ class OutputHandler:
             OutputHandler.logger.debug("values is empty. Generating fallback values from each row's values.")
             values = [list(row.values()) for row in results]
 
-        OutputHandler.logger.debug("Returning from _extract_labels_values_for_cities_and_countries with:")
-        OutputHandler.logger.debug("   labels=%r", labels)
-        OutputHandler.logger.debug("   values=%r", values)
         return labels, values
 
     @staticmethod
@@ -170,34 +217,46 @@ class OutputHandler:
         # If results is a list
         if isinstance(results, list):
             OutputHandler.logger.debug("results is a list; may contain tuples, DailyWeatherEntry, City, or dict.")
-            standardised = []
-            for row in results:
-                # 1) If it's a tuple
-                if isinstance(row, tuple):
-                    OutputHandler.logger.debug(f"Row is a tuple: {row}")
-                    standardised.append({'precipitation': round(row[0], 2)})
-
-                # 2) If it's a DailyWeatherEntry
-                elif isinstance(row, DailyWeatherEntry):
-                    OutputHandler.logger.debug(f"Row is a DailyWeatherEntry: {row}")
-                    standardised.append({
+            if not results:
+                return []
+
+            # Query results hold one row type, so the type is checked once on the first row
+            # instead of for every row
+            first = results[0]
+            # 1) If it's a result row or a tuple
+            if isinstance(first, Row):
+                # Daily precipitation rows (date, precipitation), read by column name
+                standardised = [
+                    {'date': str(mapping['date']), 'precipitation': round(mapping['precipitation'], 2)}
+                    for mapping in (row._mapping for row in results)
+                ]
+
+            elif isinstance(first, tuple):
+                standardised = [{'precipitation': round(row[0], 2)} for row in results]
+
+            # 2) If it's a DailyWeatherEntry
+            elif isinstance(first, DailyWeatherEntry):
+                standardised = [
+                    {
                         'date': row.date,
                         'precipitation': float(row.precipitation),
                         'max_temp': float(row.max_temp),
                         'min_temp': float(row.min_temp),
-                    })
-
-                # 3) If it's City or Country
-                elif isinstance(row, (City, Country)):
-                    OutputHandler.logger.debug(f"Row is a City/Country: {row}")
-                    if hasattr(row, 'to_dict'):
-                        standardised.append(row.to_dict())
-                    else:
-                        OutputHandler.logger.debug("No to_dict method found for row.")
-                # 4) If it's already a dict
-                elif isinstance(row, dict):
-                    OutputHandler.logger.debug("Row is already a dict: %r", row)
-                    standardised.append(row)
+                    }
+                    for row in results
+                ]
+
+            # 3) If it's City or Country
+            elif isinstance(first, (City, Country)):
+                standardised = [row.to_dict() for row in results]
+
+            # 4) If it's already a dict
+            elif isinstance(first, dict):
+                standardised = results
+
+            else:
+                OutputHandler.logger.debug("Unrecognised row type %s; nothing to standardise.", type(first))
+                standardised = []
 
             OutputHandler.logger.debug("Returning standardised list of length %d.", len(standardised))
             return standardised
@@ -238,35 +297,42 @@ class OutputHandler:
             print("No data to display.")
             return
         headers = list(results[0].keys())
-        column_widths = {header: len(header) for header in headers}
 
-        for row in results:
-            for header in headers:
-                value = row.get(header, "")
-                if header in {"id", "country_id"} and value is not None:
-                    try:
-                        value = int(float(value))
-                    except ValueError:
-                        pass
-                if isinstance(value, (int, float)) and header not in {"latitude", "longitude"}:
-                    value = round(value, 2)
-                    value = f"{value:.2f}"
-                column_widths[header] = max(column_widths[header], len(str(value)))
+        # Format every cell once, then size the columns from the same strings that are printed
+        cells = [[OutputHandler._format_cell(row, header) for header in headers] for row in results]
+        column_widths = [
+            max(len(header), *(len(cell) for cell in column))
+            for header, column in zip(headers, zip(*cells))
+        ]
 
-        header_format = " | ".join(f"{{:<{column_widths[header]}}}" for header in headers)
-        separator = "-+-".join("-" * column_widths[header] for header in headers)
+        header_format = " | ".join(f"{{:<{width}}}" for width in column_widths)
+        separator = "-+-".join("-" * width for width in column_widths)
 
-        print()
-        print(header_format.format(*headers))
-        print(separator)
+        # Build the whole table and write it in one call rather than printing row by row
+        lines = ["", header_format.format(*headers), separator]
+        lines.extend(header_format.format(*row_cells) for row_cells in cells)
+        OutputHandler._write_lines(lines)
 
-        for row in results:
-            row_values = [
-                str(int(row.get(header, 0))) if header in {"id", "country_id"} and row.get(header) is not None
-                else str(row.get(header, "N/A"))
-                for header in headers
-            ]
-            print(header_format.format(*row_values))
+    @staticmethod
+    def _format_cell(row, header):
+        """
+        Format one value of a generic console table row.
+
+        Parameters
+        ----------
+        row : dict
+            The row being displayed.
+        header : str
+            The column to format.
+
+        Returns
+        -------
+        str
+            The value as text. ID columns are shown as whole numbers, and a missing column as "N/A".
+        """
+        if header in OutputHandler._INTEGER_COLUMNS and row.get(header) is not None:
+            return str(int(row[header]))
+        return str(row.get(header, "N/A"))
 
     @staticmethod
     def _display_temperature_table(results):
@@ -287,24 +353,29 @@ class OutputHandler:
 
         header_line = " | ".join(f"{header:<{column_widths[header]}}" for header in headers)
         separator = "-+-".join("-" * column_widths[header] for header in headers)
-        print()
-        print(header_line)
-        print(separator)
+        lines = ["", header_line, separator]
+
+        # The widths are fixed now, so the row formats are built once rather than per row
+        month_width = column_widths['Month']
+        temperature_width = column_widths['Temperature °C']
+        row_format = f"{{:<{month_width}}} | {{:<{temperature_width}.2f}}".format
+        invalid_temperature_format = f"{{:<{month_width}}} | Invalid Temperature".format
+        invalid_row = f"{'Invalid Data':<{month_width}} | {'Invalid Data':<{temperature_width}}"
 
         for item in results:
             month = item.get("Month")
             temperature = item.get("Temperature")
             if month is not None and temperature is not None:
+                month_name = MONTH_NAMES[month - 1]
                 try:
-                    temperature = float(temperature)
-                    month_name = MONTH_NAMES[month - 1]
-                    print(f"{month_name:<{column_widths['Month']}} | {temperature:<{column_widths['Temperature °C']}.2f}")
+                    lines.append(row_format(month_name, float(temperature)))
                 except ValueError:
                     OutputHandler.logger.error("Invalid temperature value: %r", temperature)
-                    print(f"{month_name:<{column_widths['Month']}} | Invalid Temperature")
+                    lines.append(invalid_temperature_format(month_name))
             else:
                 OutputHandler.logger.error("Missing Month or Temperature in item: %r", item)
-                print(f"{'Invalid Data':<{column_widths['Month']}} | {'Invalid Data':<{column_widths['Temperature °C']}}")
+                lines.append(invalid_row)
+        OutputHandler._write_lines(lines)
 
     @staticmethod
     def _display_precipitation_table(results):
@@ -312,7 +383,8 @@ class OutputHandler:
         if not results:
             OutputHandler.logger.info("No precipitation data available.")
             return
-        headers = ['ID', 'Date', 'Precipitation']
+        # Rows carry a date and a precipitation value; none has a stored row ID to show
+        headers = ['Date', 'Precipitation']
         column_widths = {header: len(header) for header in headers}
 
         for row in results:
@@ -322,12 +394,26 @@ class OutputHandler:
 
         header_line = " | ".join(f"{header:<{column_widths[header]}}" for header in headers)
         separator = "-+-".join("-" * column_widths[header] for header in headers)
-        print()
-        print(header_line)
-        print(separator)
+        lines = ["", header_line, separator]
 
+        # One format for every row, built once the widths are known
+        row_format = " | ".join(f"{{:<{column_widths[header]}}}" for header in headers).format
+        keys = [header.lower() for header in headers]
         for row in results:
-            print(" | ".join(f"{str(row.get(header.lower(), '')):<{column_widths[header]}}" for header in headers))
+            lines.append(row_format(*(str(row.get(key, '')) for key in keys)))
+        OutputHandler._write_lines(lines)
+
+    @staticmethod
+    def _write_lines(lines):
+        """
+        Write lines of output to stdout in a single call.
+
+        Parameters
+        ----------
+        lines : list[str]
+            The lines to write, without trailing newlines.
+        """
+        sys.stdout.write("\n".join(lines) + "\n")
 
     @staticmethod
     def handle_console(results):
@@ -352,59 +438,3 @@ class OutputHandler:
         OutputHandler.logger.debug("sqlite_row_to_dict called.")
         return [dict(row) for row in rows]
 
-    @staticmethod
-    def _generate_time_period_labels(results):
-        import logging
-        logger = logging.getLogger(__name__)
-
-        logger.debug("_generate_time_period_labels called. Checking if 'Month' in results[0].")
-        if "Month" in results[0]:
-            labels = [MONTH_NAMES[row["Month"] - 1] for row in results if "Month" in row]
-            logger.debug("Generated month-based labels: %r", labels)
-            return labels
-
-        logger.debug("No 'Month' found; proceeding with daily or multi-month logic.")
-        start_date = datetime.strptime(results[0]['date'], '%Y-%m-%d')
-        end_date = datetime.strptime(results[-1]['date'], '%Y-%m-%d')
-        days_difference = (end_date - start_date).days + 1
-        logger.debug(f"Days difference: {days_difference}")
-
-        labels = []
-
-        if days_difference <= 14:
-            logger.debug("Generating daily labels.")
-            for i in range(days_difference):
-                label_date = start_date + timedelta(days=i)
-                labels.append(label_date.strftime('%Y-%m-%d'))
-        elif days_difference <= 31:
-            logger.debug("Generating labels every 2 days (15-31 days).")
-            for i in range(0, days_difference, 2):
-                label_date = start_date + timedelta(days=i)
-                labels.append(label_date.strftime('%Y-%m-%d'))
-        else:
-            months_difference = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
-            logger.debug(f"Months difference: {months_difference}")
-            if months_difference <= 12:
-                logger.debug("Generating monthly labels (<=12 months).")
-                for i in range(months_difference):
-                    month_label = (start_date + timedelta(days=30 * i)).strftime('%b %Y')
-                    labels.append(month_label)
-            elif months_difference <= 24:
-                logger.debug("Generating quarterly labels (<=24 months).")
-                for i in range(0, months_difference, 3):
-                    quarter_label = f"Q{(i // 3) + 1} ({start_date.year + (i // 12)})"
-                    labels.append(quarter_label)
-            elif months_difference <= 48:
-                logger.debug("Generating half-yearly labels (<=48 months).")
-                for i in range(0, months_difference, 6):
-                    half_year_label = f"H{(i // 6) + 1} ({start_date.year + (i // 12)})"
-                    labels.append(half_year_label)
-            else:
-                logger.debug("Generating yearly labels (>48 months).")
-                for i in range(0, months_difference, 12):
-                    year_label = f"{start_date.year + (i // 12)}"
-                    labels.append(year_label)
-
-        logger.debug("Time period labels generated: %r", labels)
-        logger.debug("Label count: %d", len(labels))
-        return labels
@@ -1,5 +1,10 @@
+import importlib
+
+
 class OutputHandlerRegistry:
     _handlers = {}
+    # Handlers imported on first use, so heavy dependencies such as matplotlib load only when needed
+    _lazy_handlers = {}
 
     @classmethod
     def register_handler(cls, name, handler):
@@ -15,6 +20,44 @@ class OutputHandlerRegistry:
         """
         cls._handlers[name] = handler
 
+    @classmethod
+    def register(cls, *names):
+        """
+        Class decorator form of register_handler, used on the handler itself so it is
+        registered when its module is imported.
+
+        Parameters
+        ----------
+        *names : str
+            The names to register the decorated handler under.
+
+        Returns
+        -------
+        callable
+            A decorator that registers and returns the handler unchanged.
+        """
+        def decorator(handler):
+            for name in names:
+                cls._handlers[name] = handler
+            return handler
+        return decorator
+
+    @classmethod
+    def register_lazy_handler(cls, name, module_name, attribute):
+        """
+        Registers a handler by name without importing it until it is first requested.
+
+        Parameters
+        ----------
+        name : str
+            The name of the handler.
+        module_name : str
+            The module that defines the handler.
+        attribute : str
+            Dotted path to the handler within the module (e.g., "GraphOutputHandler.handle_graph").
+        """
+        cls._lazy_handlers[name] = (module_name, attribute)
+
     @classmethod
     def get_handler(cls, name):
         """
@@ -30,4 +73,11 @@ class OutputHandlerRegistry:
         callable
             The registered handler if found; otherwise, None.
         """
-        return cls._handlers.get(name)
+        handler = cls._handlers.get(name)
+        if handler is None and name in cls._lazy_handlers:
+            module_name, attribute = cls._lazy_handlers.pop(name)
+            handler = importlib.import_module(module_name)
+            for part in attribute.split("."):
+                handler = getattr(handler, part)
+            cls._handlers[name] = handler
+        return handler
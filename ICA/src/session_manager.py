@@ -64,6 +64,7 @@ class SessionManager:
         Logs detailed information about the current session's state.
         """
         if hasattr(self, 'session'):
-            self.logger.debug(f"Session details: {id(self.session)}, Active: {self.session.is_active}, Transaction: {self.session.in_transaction()}")
+            self.logger.debug("Session details: %s, Active: %s, Transaction: %s",
+                              id(self.session), self.session.is_active, self.session.in_transaction())
         else:
             self.logger.warning("No active session to log.")
\ No newline at end of file
@@ -1,14 +1,43 @@
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import bindparam, event, func, null, select, union_all
 from sqlalchemy import exists
-from models.daily_weather_entry import DailyWeatherEntry
 from models.city import City
 from models.country import Country
+from models.monthly_weather_summary import MonthlyWeatherSummary
 from database_query_interface import DatabaseQueryInterface
-from collections import defaultdict
-
+from statements import (
+    DAILY, DAILY_PERIOD, STMT_CITY_BY_NAME, STMT_COUNTRY_BY_NAME, STMT_MONTHLY_PRECIP_BY_COUNTRY, STMT_PRECIP_FOR_PERIOD
+)
+from constants import QUERY_CACHE_SIZE
+from collections import OrderedDict
+
+# Statements are built once with bound parameters, so each call reuses SQLAlchemy's compiled
+# statement and the driver's prepared statement instead of building and parsing the query again
+
+# Fixed "view all" statements
+_STMT_ALL_COUNTRIES = select(Country)
+_STMT_ALL_CITIES = select(City)
+
+# Daily aggregates for a city over a date range
+_STMT_AVG_TEMP_FOR_PERIOD = select(func.avg(DAILY.c.mean_temp)).where(*DAILY_PERIOD)
+# Distinct dates, as the stored data holds duplicate rows for some days
+_STMT_STORED_DAYS = select(func.count(DAILY.c.date.distinct())).where(*DAILY_PERIOD)
+
+# Yearly aggregates for a city from the monthly roll-up
+_AVG_MEAN_TEMP = func.sum(MonthlyWeatherSummary.mean_temp_total) / func.sum(MonthlyWeatherSummary.mean_temp_days)
+_CITY_YEAR = (
+    MonthlyWeatherSummary.city_id == bindparam("city_id"),
+    MonthlyWeatherSummary.year == bindparam("year"),
+)
+_STMT_AVERAGE_TEMPERATURE = select(_AVG_MEAN_TEMP).where(*_CITY_YEAR)
+_STMT_PRECIPITATION_TOTAL = select(func.sum(MonthlyWeatherSummary.precipitation)).where(*_CITY_YEAR)
+# Monthly average temperatures, followed by the annual average as a row with a NULL month
+_STMT_TEMPERATURE_REPORT = union_all(
+    select(MonthlyWeatherSummary.month, _AVG_MEAN_TEMP).where(*_CITY_YEAR).group_by(MonthlyWeatherSummary.month),
+    select(null(), _AVG_MEAN_TEMP).where(*_CITY_YEAR),
+)
 
 
 class SQLiteQuery(DatabaseQueryInterface):
@@ -28,6 +57,60 @@ class SQLiteQuery(DatabaseQueryInterface):
         """
         self.logger = logging.getLogger(self.__class__.__name__)
         self.session = session
+        # Results of repeated read-only queries, least recently used first,
+        # dropped whenever the session commits a write
+        self._results_cache = OrderedDict()
+        event.listen(session, "after_commit", self.clear_cache)
+
+
+    def clear_cache(self, session=None):
+        """
+        Clear the cached query results.
+
+        Parameters
+        ----------
+        session : Session, optional
+            The session that committed, when called as an ``after_commit`` listener.
+        """
+        self._results_cache.clear()
+
+
+    def _cached(self, key, query):
+        """
+        Return the cached result for a query, running it on a cache miss and evicting
+        the least recently used result once QUERY_CACHE_SIZE results are held.
+
+        Parameters
+        ----------
+        key : tuple
+            Identifies the query and its parameters.
+        query : callable
+            Runs the query and returns its result.
+
+        Returns
+        -------
+        object
+            The query result.
+        """
+        if key in self._results_cache:
+            self._results_cache.move_to_end(key)
+            return self._results_cache[key]
+
+        result = self._results_cache[key] = query()
+        if len(self._results_cache) > QUERY_CACHE_SIZE:
+            self._results_cache.popitem(last=False)
+        return result
+
+
+    def preload_reference_data(self):
+        """
+        Load the country and city lists into the results cache, replacing anything cached,
+        so the "view all" menu options are served from memory. Also used to force a reload.
+        """
+        self.clear_cache()
+        self.get_all_countries()
+        self.get_all_cities()
+        self.logger.debug("Reference data preloaded")
 
 
     def get_all_countries(self):
@@ -39,7 +122,7 @@ class SQLiteQuery(DatabaseQueryInterface):
         list[Country]
             All countries as SQLAlchemy objects.
         """
-        return self.session.query(Country).all()
+        return self._cached(("countries",), lambda: self.session.scalars(_STMT_ALL_COUNTRIES).all())
 
 
     def get_country_by_name(self, country_name):
@@ -58,20 +141,21 @@ class SQLiteQuery(DatabaseQueryInterface):
         return self.session.query(Country).filter(Country.name == country_name).first()
 
 
-    def get_country_by_id(self, country_name):
+    def get_country_by_id(self, country_id):
         """
-        Fetch a country by name.
+        Fetch a country by its primary key.
 
         Parameters
         ----------
-        country_name : str
-            The country name.
+        country_id : int
+            The country ID.
 
         Returns
         -------
         Country or None
         """
-        return self.session.query(Country).filter(Country.name == country_name).first()
+        # Session.get returns an already loaded country from the identity map without a SELECT
+        return self.session.get(Country, country_id)
 
 
     def get_all_cities(self):
@@ -82,7 +166,7 @@ class SQLiteQuery(DatabaseQueryInterface):
         -------
         list[City]
         """
-        return self.session.query(City).all()
+        return self._cached(("cities",), lambda: self.session.scalars(_STMT_ALL_CITIES).all())
 
 
     def get_average_temperature(self, city_id: int, year: int):
@@ -103,21 +187,12 @@ class SQLiteQuery(DatabaseQueryInterface):
         # Log the city_id and year
         self.logger.debug(f"Received city_id: {city_id} (type: {type(city_id)}), year: {year} (type: {type(year)})")
 
-        # Generate the start and end dates for the given year
         int_year = int(year)
-        start_date = datetime(int_year, 1, 1)
-        end_date = datetime(int_year, 12, 31)
-
-        # Log the generated start and end dates with their types
-        self.logger.debug(f"Generated start_date: {start_date} (type: {type(start_date)}), end_date: {end_date} (type: {type(end_date)})")
-
-        # Query the database to get the average temperature
-        avg_temp = (
-            self.session.query(func.avg(DailyWeatherEntry.mean_temp))
-            .filter(DailyWeatherEntry.city_id == city_id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .scalar()
-        )
+
+        # Average of the daily mean temperatures over the year, from the city's monthly roll-up
+        avg_temp = self._cached(("average_temperature", city_id, int_year), lambda: self.session.scalar(
+            _STMT_AVERAGE_TEMPERATURE, {"city_id": city_id, "year": int_year}
+        ))
 
         # Log the result of the query and its type
         # self.logger.debug(f"Query result avg_temp: {avg_temp} (type: {type(avg_temp)})")
@@ -145,16 +220,68 @@ class SQLiteQuery(DatabaseQueryInterface):
         -------
         float or None
         """
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31)
+        return self._cached(("precipitation", city_id, year), lambda: self.session.scalar(
+            _STMT_PRECIPITATION_TOTAL, {"city_id": city_id, "year": year}
+        ))
 
-        total_precip = (
-            self.session.query(func.sum(DailyWeatherEntry.precipitation))
-            .filter(DailyWeatherEntry.city_id == city_id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .scalar()
-        )
-        return total_precip
+
+    def get_temperature_report(self, city_id: int, year: int):
+        """
+        Calculate the average temperature for a city in a given year, together with
+        the average for each month, in a single query.
+
+        Parameters
+        ----------
+        city_id : int
+            City ID.
+        year : int
+            Year.
+
+        Returns
+        -------
+        tuple[float or None, dict]
+            The annual average temperature, and the monthly averages keyed by month number.
+        """
+        rows = self._cached(("temperature_report", city_id, int(year)), lambda: self.session.execute(
+            _STMT_TEMPERATURE_REPORT, {"city_id": city_id, "year": int(year)}
+        ).all())
+
+        annual_avg = None
+        monthly_avg = {}
+        for month, avg_temp in rows:
+            if month is None:
+                annual_avg = avg_temp
+            else:
+                monthly_avg[month] = avg_temp
+
+        self.logger.debug(f"Temperature report for city {city_id} in {year}: {annual_avg}, {monthly_avg}")
+        return annual_avg, monthly_avg
+
+
+    def has_weather_for_period(self, city_id: int, start_date: str, end_date: str):
+        """
+        Check whether a weather row is stored for every day of a period.
+
+        Parameters
+        ----------
+        city_id : int
+            City ID.
+        start_date : str
+            First day of the period (format: yyyy-mm-dd).
+        end_date : str
+            Last day of the period (format: yyyy-mm-dd).
+
+        Returns
+        -------
+        bool
+            True if no day in the period is missing.
+        """
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+        stored_days = self._cached(("stored_days", city_id, start, end), lambda: self.session.scalar(
+            _STMT_STORED_DAYS, {"city_id": city_id, "start_date": start, "end_date": end}
+        ))
+        return stored_days >= (end - start).days + 1
 
 
     def average_seven_day_precipitation(self, city_name, start_date):
@@ -172,17 +299,14 @@ class SQLiteQuery(DatabaseQueryInterface):
         -------
         float or None
         """
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        start_date = datetime.fromisoformat(start_date)
         end_date = start_date + timedelta(days=6)
 
-        city = self.session.query(City).filter(City.name.ilike(city_name)).first()
+        city = self.session.scalars(STMT_CITY_BY_NAME, {"name": city_name}).first()
 
-        avg_precip = (
-            self.session.query(DailyWeatherEntry.date, DailyWeatherEntry.precipitation)
-            .filter(DailyWeatherEntry.city_id == city.id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .all()
-        )
+        avg_precip = self._cached(("seven_day_precipitation", city.id, start_date), lambda: self.session.execute(
+            STMT_PRECIP_FOR_PERIOD, {"city_id": city.id, "start_date": start_date, "end_date": end_date}
+        ).all())
         precip_data = [(entry[0], entry[1]) for entry in avg_precip]
         self.logger.debug(f"7 day precip: {precip_data}")
         return precip_data
@@ -207,10 +331,10 @@ class SQLiteQuery(DatabaseQueryInterface):
         """
         self.logger.debug(f"Received city: {city_name}, start_date: {start_date}, end_date: {end_date})")
 
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
+        start_date = datetime.fromisoformat(start_date)
+        end_date = datetime.fromisoformat(end_date)
 
-        city = self.session.query(City).filter(City.name.ilike(city_name)).first()
+        city = self.session.scalars(STMT_CITY_BY_NAME, {"name": city_name}).first()
 
         if not city:
             self.logger.error(f"City '{city_name}' not found in the database.")
@@ -219,12 +343,9 @@ class SQLiteQuery(DatabaseQueryInterface):
         self.logger.debug(f"Fetched city: {city.name} with ID: {city.id}")
 
         # Query the average temperature for the given city and date range
-        avg_temp = (
-            self.session.query(func.avg(DailyWeatherEntry.mean_temp))
-            .filter(DailyWeatherEntry.city_id == city.id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .scalar()
-        )
+        avg_temp = self._cached(("average_temp_by_city", city.id, start_date, end_date), lambda: self.session.scalar(
+            _STMT_AVG_TEMP_FOR_PERIOD, {"city_id": city.id, "start_date": start_date, "end_date": end_date}
+        ))
 
         self.logger.debug(f"Average temperature for {city_name} from {start_date} to {end_date}: {avg_temp} °C")
 
@@ -249,47 +370,27 @@ class SQLiteQuery(DatabaseQueryInterface):
             A dictionary containing the total annual precipitation and a breakdown by month.
         """
         # Retrieve the country
-        country = self.session.query(Country).filter(Country.name.ilike(country_name)).first()
+        country = self.session.scalars(STMT_COUNTRY_BY_NAME, {"name": country_name}).first()
 
         if not country:
             self.logger.error(f"Country '{country_name}' not found in the database.")
             return None
 
-        # Define the start and end dates for the year
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31)
-
-        self.logger.debug(f"Received country: {country.name}, start_date: {start_date}, end_date: {end_date})")
-
-        # Query for monthly precipitation totals per city in the country
-        monthly_precip = (
-            self.session.query(
-                func.extract('month', DailyWeatherEntry.date).label('month'),
-                func.sum(DailyWeatherEntry.precipitation).label('monthly_precip')
-            )
-            .join(City, City.id == DailyWeatherEntry.city_id)
-            .join(Country, Country.id == City.country_id)
-            .filter(Country.id == country.id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .group_by('month')
-            .order_by('month')
-            .all()
-        )
+        self.logger.debug(f"Received country: {country.name}, year: {year}")
 
-        # Aggregate the data into a dictionary for monthly precipitation
-        monthly_data = {month: round(precip, 2) for month, precip in monthly_precip}
-
-        # Query for total precipitation for the year
-        total_precip = (
-            self.session.query(func.sum(DailyWeatherEntry.precipitation))
-            .join(City, City.id == DailyWeatherEntry.city_id)
-            .join(Country, Country.id == City.country_id)
-            .filter(Country.id == country.id)
-            .filter(DailyWeatherEntry.date.between(start_date, end_date))
-            .scalar()
-        )
+        # Monthly precipitation totals across the country's cities, from the monthly roll-up
+        monthly_precip = self._cached(("monthly_precipitation_by_country", country.id, year), lambda: self.session.execute(
+            STMT_MONTHLY_PRECIP_BY_COUNTRY, {"country_id": country.id, "year": year}
+        ).all())
+
+        # Aggregate the monthly breakdown and the annual total in a single pass
+        monthly_data = {}
+        total_precip = 0
+        for month, precip in monthly_precip:
+            monthly_data[month] = round(precip, 2)
+            total_precip += precip
 
-        total_precip = round(total_precip, 2) if total_precip is not None else 0
+        total_precip = round(total_precip, 2)
 
         self.logger.debug(f"Total precipitation for {country_name} in {year}: {total_precip} mm")
 
@@ -365,29 +466,3 @@ class SQLiteQuery(DatabaseQueryInterface):
         self.session.commit()
         self.session.refresh(new_city)
         return new_city
-
-
-    def get_monthly_average_temperature(self, daily_weather_entries):
-        """
-        Calculate the average temperature for each month.
-        
-        Parameters
-        ----------
-        daily_weather_entries : list
-            List of DailyWeatherEntry objects containing daily temperatures and dates.
-        
-        Returns
-        -------
-        dict
-            A dictionary with months as keys and average temperatures as values.
-        """
-        monthly_data = defaultdict(list)
-
-        for entry in daily_weather_entries:
-            month = entry.date.month
-            monthly_data[month].append(entry.mean_temp)
-
-        # Calculate average temperature for each month
-        monthly_avg_temp = {month: sum(temps)/len(temps) for month, temps in monthly_data.items()}
-
-        return monthly_avg_temp
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Statements shared by the query, location and geocoding modules.
+
+They are built once with bound parameters, so every caller reuses SQLAlchemy's compiled
+statement and the driver's prepared statement instead of building and parsing the query again.
+"""
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload
+from models import City, Country, DailyWeatherEntry, MonthlyWeatherSummary
+
+# Loader option for city queries, so cities come back with their country in one SELECT
+LOAD_CITY_COUNTRY = joinedload(City.country)
+
+# Case-insensitive lookups by name, returning the first match. Names are compared with lower() on
+# both sides so the ix_city_name_lower and ux_country_name_lower indexes are used, and so % and _
+# in user input are matched literally
+STMT_CITY_BY_NAME = (
+    select(City)
+    .options(LOAD_CITY_COUNTRY)
+    .where(func.lower(City.name) == func.lower(bindparam("name")))
+    .limit(1)
+)
+STMT_COUNTRY_BY_NAME = select(Country).where(func.lower(Country.name) == func.lower(bindparam("name"))).limit(1)
+
+# Adds a country in one round trip, returning nothing if the unique lower(name) index already holds it
+STMT_INSERT_COUNTRY = sqlite_insert(Country).on_conflict_do_nothing().returning(Country)
+
+# Daily rows for a city over a date range, read from the table as plain rows rather than ORM entities
+DAILY = DailyWeatherEntry.__table__
+DAILY_PERIOD = (
+    DAILY.c.city_id == bindparam("city_id"),
+    DAILY.c.date.between(bindparam("start_date"), bindparam("end_date")),
+)
+STMT_PRECIP_FOR_PERIOD = select(DAILY.c.date, DAILY.c.precipitation).where(*DAILY_PERIOD)
+
+# Monthly precipitation totals across a country's cities in one year, read from the monthly roll-up
+STMT_MONTHLY_PRECIP_BY_COUNTRY = (
+    select(MonthlyWeatherSummary.month, func.sum(MonthlyWeatherSummary.precipitation))
+    .join(City, City.id == MonthlyWeatherSummary.city_id)
+    .where(City.country_id == bindparam("country_id"), MonthlyWeatherSummary.year == bindparam("year"))
+    .group_by(MonthlyWeatherSummary.month)
+    .order_by(MonthlyWeatherSummary.month)
+)
@@ -1,17 +1,35 @@
+from datetime import timedelta
+from itertools import islice
+from sqlalchemy import bindparam, exists, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from constants import *
-from models import DailyWeatherEntry
+from models import DailyWeatherEntry, MonthlyWeatherSummary
 from base_api_service import BaseApiService
 from weather_data import WeatherData
 
+# Adds one day's weather unless the city already has a row for that date, the equivalent of
+# INSERT OR IGNORE without a unique index, which the duplicate rows in the shipped data rule out
+_DAILY = DailyWeatherEntry.__table__
+_NEW_DAY_PARAMS = {
+    name: bindparam(name, type_=_DAILY.c[name].type)
+    for name in ("city_id", "date", "min_temp", "max_temp", "mean_temp", "precipitation")
+}
+_STMT_INSERT_NEW_DAY = _DAILY.insert().from_select(
+    list(_NEW_DAY_PARAMS),
+    select(*_NEW_DAY_PARAMS.values()).where(~exists().where(
+        _DAILY.c.city_id == _NEW_DAY_PARAMS["city_id"],
+        _DAILY.c.date == _NEW_DAY_PARAMS["date"],
+    )),
+)
+
 class WeatherApiService(BaseApiService):
     """
     Service for interacting with the Open-Meteo Weather Data API.
     """
-    def __init__(self, session: Session, max_retries=3, retry_delay=2):
+    def __init__(self, session: Session, max_retries=3, retry_delay=2, http_session=None):
         base_url = "https://archive-api.open-meteo.com/v1/archive"
-        super().__init__(base_url=base_url, max_retries=max_retries, retry_delay=retry_delay)
+        super().__init__(base_url=base_url, max_retries=max_retries, retry_delay=retry_delay, http_session=http_session)
         self.session = session
 
 
@@ -34,8 +52,8 @@ class WeatherApiService(BaseApiService):
 
         Returns
         -------
-        dict
-            Daily weather data for the specified period.
+        list[dict]
+            Daily weather rows for the specified period, or an empty list on failure.
         """
         self.logger.debug(f"Initial values: {latitude}, {longitude}, {start_date}, {end_date}, {city_id}")
         params = {
@@ -67,11 +85,10 @@ class WeatherApiService(BaseApiService):
                     self.logger.debug(f"Valid weather data received: {weather_data}")
                     self.logger.debug(f"weather_api_service, City Id: {city_id}.")
 
-                    daily_weather_entries = weather_data.map_to_daily_weather(city_id)
-                    self.logger.debug(f"Daily weather data: {daily_weather_entries[:5]}")
-                    # self.logger.debug(f"api service, daily_weather_entries: {daily_weather_entries}")
-                    self._store_weather_data(daily_weather_entries, city_id)
-                    return daily_weather_entries
+                    daily_weather_rows = weather_data.to_dicts(city_id)
+                    self.logger.debug(f"Daily weather data: {daily_weather_rows[:5]}")
+                    self._store_weather_data(daily_weather_rows, city_id)
+                    return daily_weather_rows
                 else:
                     self.logger.error("Invalid weather data received.")
                     raise ValueError("Weather data is invalid or incomplete.")
@@ -79,30 +96,45 @@ class WeatherApiService(BaseApiService):
                 raise ValueError("Weather API returned unexpected structure.")
         except Exception as e:
             self.logger.error(f"Weather API Error: {e}")
-            return WeatherData({
-                TEMPERATURE_2M_MAX: [],
-                TEMPERATURE_2M_MIN: [],
-                PRECIPITATION_SUM: []
-            })
+            return []
 
 
-    def _store_weather_data(self, daily_weather_entries, city_id: int):
+    def _store_weather_data(self, daily_weather_rows, city_id: int):
         """
-        Store weather data in the database.
+        Store weather data in the database with executemany, INSERT_BATCH_SIZE rows at a time,
+        skipping days already stored for the city, and refresh the monthly summaries they fall in,
+        committed as a single transaction.
 
         Parameters
         ----------
-        daily_weather_entries : list
-            List of DailyWeatherEntry objects to store.
+        daily_weather_rows : iterable of dict
+            Rows for the daily_weather_entries table, as produced by WeatherData.to_dicts.
         city_id : int
             ID of the city associated with the weather data.
         """
         self.logger.debug("weather_api_service, _store_weather_data")
         try:
-            # Add each daily weather entry to the session
-            for entry in daily_weather_entries:
-                self.session.add(entry)
+            rows = iter(daily_weather_rows)
+            first_date = last_date = None
+            while True:
+                chunk = list(islice(rows, INSERT_BATCH_SIZE))
+                if not chunk:
+                    break
+                self.session.execute(_STMT_INSERT_NEW_DAY, chunk)
+                chunk_first = min(row["date"] for row in chunk)
+                chunk_last = max(row["date"] for row in chunk)
+                first_date = chunk_first if first_date is None else min(first_date, chunk_first)
+                last_date = chunk_last if last_date is None else max(last_date, chunk_last)
 
+            if first_date is not None:
+                # Recompute every month the new rows touch, from its first day to the first day of the next
+                month_start = first_date.replace(day=1)
+                next_month_start = (last_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+                self.session.execute(MonthlyWeatherSummary.refresh_statement(
+                    DailyWeatherEntry.city_id == city_id,
+                    DailyWeatherEntry.date >= month_start,
+                    DailyWeatherEntry.date < next_month_start,
+                ))
             self.session.commit()
             self.logger.debug(f"Stored weather data for city ID {city_id}")
         except SQLAlchemyError as e:
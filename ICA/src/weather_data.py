@@ -1,5 +1,5 @@
 import logging
-from datetime import datetime
+import numpy as np
 from models.daily_weather_entry import DailyWeatherEntry
 
 class WeatherData:
@@ -12,10 +12,11 @@ class WeatherData:
             self.logger.error(f"Invalid data format: {type(weather_data)}. Expected a dictionary.")
             raise ValueError("weather_data must be a dictionary.")
 
-        self.temperature_2m_max = weather_data.get("temperature_2m_max", [])
-        self.temperature_2m_min = weather_data.get("temperature_2m_min", [])
-        self.precipitation_sum = weather_data.get("precipitation_sum", [])
-        self.dates = weather_data.get("time", [])
+        # Store each field as a column array; missing readings (None) become NaN
+        self.temperature_2m_max = np.asarray(weather_data.get("temperature_2m_max", []), dtype=np.float64)
+        self.temperature_2m_min = np.asarray(weather_data.get("temperature_2m_min", []), dtype=np.float64)
+        self.precipitation_sum = np.asarray(weather_data.get("precipitation_sum", []), dtype=np.float64)
+        self.dates = np.asarray(weather_data.get("time", []), dtype="datetime64[D]")
 
         self.logger.debug(f"Weather data initialized with {len(self.dates)} entries.")
 
@@ -25,7 +26,7 @@ class WeatherData:
         Validate the structure of the weather data.
         Returns True if all expected fields are present and not empty.
         """
-        if not self.temperature_2m_max or not self.temperature_2m_min or not self.precipitation_sum or not self.dates:
+        if not self.temperature_2m_max.size or not self.temperature_2m_min.size or not self.precipitation_sum.size or not self.dates.size:
             self.logger.error(f"Invalid weather data. Missing or empty required fields: {self.temperature_2m_max}, {self.temperature_2m_min}, {self.precipitation_sum}, {self.dates}")
             return False
         return True
@@ -45,43 +46,51 @@ class WeatherData:
         return True
 
 
-    def map_to_daily_weather(self, city_id: int):
+    def to_dicts(self, city_id: int):
         """
-        Maps the raw weather data to DailyWeatherEntry objects.
-        Returns a list of DailyWeatherEntry objects.
+        Maps the raw weather data to row dictionaries for the daily_weather_entries table.
+        Missing readings are stored as 0, and the mean temperature is derived column-wise.
+        Returns a list of dictionaries suitable for a bulk insert.
         """
         if not self.is_valid():
             self.logger.error("Invalid weather data. Missing or empty required fields.")
             raise ValueError("Invalid weather data. Missing or empty required fields.")
 
-        self.logger.debug("Mapping raw weather data to DailyWeatherEntry objects...")
-        self.logger.debug(f"City ID: {city_id}")
-
-        daily_weather_entries = []
-
-        for date, temp_max, temp_min, precip in zip(
-                self.dates,
-                self.temperature_2m_max,
-                self.temperature_2m_min,
-                self.precipitation_sum
-        ):
-            
-            # self.logger.debug(f"Mapping weather data - Date: {date}, Max Temp: {temp_max}, Min Temp: {temp_min}, Precipitation: {precip}")
-            mean_temp = (temp_max + temp_min) / 2 if temp_max is not None and temp_min is not None else 0
-
-            daily_weather_entries.append(
-                DailyWeatherEntry(
-                    city_id=city_id,
-                    date=datetime.strptime(date, "%Y-%m-%d").date(),
-                    min_temp=temp_min if temp_min is not None else 0,
-                    max_temp=temp_max if temp_max is not None else 0,
-                    mean_temp=mean_temp,
-                    precipitation=precip if precip is not None else 0
-                )
+        self.logger.debug(f"Mapping raw weather data to rows for city ID: {city_id}")
+
+        temp_max = np.nan_to_num(self.temperature_2m_max, nan=0.0)
+        temp_min = np.nan_to_num(self.temperature_2m_min, nan=0.0)
+        precip = np.nan_to_num(self.precipitation_sum, nan=0.0)
+        mean_temp = np.nan_to_num((self.temperature_2m_max + self.temperature_2m_min) / 2, nan=0.0)
+
+        rows = [
+            {
+                "city_id": city_id,
+                "date": date,
+                "min_temp": t_min,
+                "max_temp": t_max,
+                "mean_temp": t_mean,
+                "precipitation": p
+            }
+            for date, t_max, t_min, t_mean, p in zip(
+                self.dates.tolist(),
+                temp_max.tolist(),
+                temp_min.tolist(),
+                mean_temp.tolist(),
+                precip.tolist()
             )
+        ]
+
+        self.logger.debug(f"Mapped {len(rows)} rows.")
+        return rows
+
 
-        self.logger.debug(f"Mapped {len(daily_weather_entries)} entries to DailyWeatherEntry objects.")
-        return daily_weather_entries
+    def map_to_daily_weather(self, city_id: int):
+        """
+        Maps the raw weather data to DailyWeatherEntry objects.
+        Returns a list of DailyWeatherEntry objects.
+        """
+        return [DailyWeatherEntry(**row) for row in self.to_dicts(city_id)]
 
 
     def __str__(self):
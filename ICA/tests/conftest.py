@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add the src directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from models import Base
+from session_manager import SessionManager
+
+
+@pytest.fixture
+def memory_db(request):
+    """
+    An in-memory SQLite database with the full schema, shared by the test through one connection.
+    Sets engine, session_manager and session on the test case, and resets the SessionManager
+    singleton before and after so each test gets its own session.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionManager._instance = None
+    session_manager = SessionManager(sessionmaker(bind=engine, expire_on_commit=False, autoflush=False))
+
+    request.instance.engine = engine
+    request.instance.session_manager = session_manager
+    request.instance.session = session_manager.get_session()
+    yield
+    session_manager.close_session()
+    SessionManager._instance = None
+    engine.dispose()
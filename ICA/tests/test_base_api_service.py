@@ -29,3 +29,15 @@ class TestBaseApiService(unittest.TestCase):
 
         self.assertIn("after 2 attempts", str(context.exception))
         self.assertEqual(mock_get.call_count, 2)
+
+    @patch("time.sleep")
+    def test_rate_limit_waits_when_exceeded(self, mock_sleep):
+        """Test that requests beyond the rate limit wait for the window to pass."""
+        service = BaseApiService(base_url="http://mockapi.com", rate_limit_calls=2, rate_limit_period=60)
+
+        service._wait_for_rate_limit()
+        service._wait_for_rate_limit()
+        mock_sleep.assert_not_called()
+
+        service._wait_for_rate_limit()
+        mock_sleep.assert_called_once()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import patch
+import pytest
+from sqlalchemy import func, select
+from models import City, Country
+from geocoding_api_service import GeocodingApiService
+from location_manager import LocationManager
+
+
+def geocoding_result(name, country=None):
+    """Build a geocoding API result, with no country fields if country is None."""
+    result = {"name": name, "latitude": 1.5, "longitude": 2.5, "timezone": "UTC"}
+    if country:
+        result["country"] = country
+    return result
+
+
+@pytest.mark.usefixtures("memory_db")
+class TestEnsureLocationsInDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = LocationManager(self.session_manager, GeocodingApiService(self.session_manager))
+
+    def tearDown(self):
+        self.manager.close()
+
+    def ensure(self, geocoded):
+        """Run ensure_locations_in_database with search_city returning the given results by name."""
+        with patch.object(self.manager.geocoding_service, "search_city", side_effect=lambda name: geocoded[name]):
+            return self.manager.ensure_locations_in_database(list(geocoded))
+
+    def count_countries(self, name):
+        return self.session.scalar(
+            select(func.count()).select_from(Country).where(func.lower(Country.name) == name.lower())
+        )
+
+    def test_new_country(self):
+        """Test a city in a country that is not stored adds both."""
+        cities = self.ensure({"Testville": [geocoding_result("Testville", "Newland")]})
+
+        self.assertEqual(cities["Testville"].name, "Testville")
+        self.assertEqual(cities["Testville"].country.name, "Newland")
+        self.assertEqual(self.count_countries("Newland"), 1)
+
+    def test_stored_country_in_another_case(self):
+        """Test cities are linked to a country stored under a different case instead of adding it again."""
+        self.session.add(Country(name="zzland", timezone="UTC"))
+        self.session.commit()
+
+        cities = self.ensure({
+            "first": [geocoding_result("First Town", "ZZLAND")],
+            "second": [geocoding_result("Second Town", "ZZLAND")],
+        })
+
+        self.assertEqual(cities["first"].country.name, "zzland")
+        self.assertEqual(cities["second"].country.name, "zzland")
+        self.assertEqual(self.count_countries("zzland"), 1)
+        self.assertEqual(self.session.scalar(select(func.count()).select_from(City)), 2)
+
+    def test_results_without_country(self):
+        """Test cities with no country in their results share one stored "Unavailable" country."""
+        cities = self.ensure({
+            "first": [geocoding_result("Nowhere One")],
+            "second": [geocoding_result("Nowhere Two")],
+        })
+
+        self.assertEqual(cities["first"].country.name, "Unavailable")
+        self.assertEqual(cities["second"].country_id, cities["first"].country_id)
+        self.assertEqual(self.count_countries("Unavailable"), 1)
+
+    def test_stored_city_is_not_geocoded(self):
+        """Test names already stored are returned without calling the Geocoding API."""
+        self.ensure({"Testville": [geocoding_result("Testville", "Newland")]})
+
+        with patch.object(self.manager.geocoding_service, "search_city") as search_city:
+            cities = self.manager.ensure_locations_in_database(["testville"])
+
+        search_city.assert_not_called()
+        self.assertEqual(cities["testville"].name, "Testville")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+import os
+
+# Add the src directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import unittest
+from datetime import date
+from weather_data import WeatherData
+
+
+class TestWeatherData(unittest.TestCase):
+
+    def setUp(self):
+        self.weather_data = WeatherData({
+            "time": ["2023-01-01", "2023-01-02"],
+            "temperature_2m_max": [10.0, None],
+            "temperature_2m_min": [4.0, 2.0],
+            "precipitation_sum": [1.5, None]
+        })
+
+    def test_to_dicts(self):
+        """Test raw weather data is mapped to insertable rows."""
+        rows = self.weather_data.to_dicts(7)
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0], {
+            "city_id": 7,
+            "date": date(2023, 1, 1),
+            "min_temp": 4.0,
+            "max_temp": 10.0,
+            "mean_temp": 7.0,
+            "precipitation": 1.5
+        })
+
+    def test_to_dicts_missing_values(self):
+        """Test missing readings are stored as zero."""
+        rows = self.weather_data.to_dicts(7)
+
+        self.assertEqual(rows[1]["max_temp"], 0)
+        self.assertEqual(rows[1]["mean_temp"], 0)
+        self.assertEqual(rows[1]["precipitation"], 0)
+
+    def test_to_dicts_invalid(self):
+        """Test empty weather data cannot be mapped."""
+        with self.assertRaises(ValueError):
+            WeatherData({}).to_dicts(7)
+
+
+if __name__ == "__main__":
+    unittest.main()
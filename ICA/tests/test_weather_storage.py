@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine, func, select
+from models import City, Country, DailyWeatherEntry, LocationAlias, MonthlyWeatherSummary
+from initialise_db import initialise_db, SCHEMA_VERSION
+from geocoding_api_service import GeocodingApiService
+from location_manager import LocationManager
+from weather_api_service import WeatherApiService
+from sqlite_query import SQLiteQuery
+
+
+def daily_rows(city_id, start, days, precipitation=1.0, mean_temp=5.0):
+    """Build consecutive daily_weather_entries rows, as WeatherData.to_dicts does."""
+    return [
+        {
+            "city_id": city_id,
+            "date": start + timedelta(days=i),
+            "min_temp": mean_temp - 1,
+            "max_temp": mean_temp + 1,
+            "mean_temp": mean_temp,
+            "precipitation": precipitation,
+        }
+        for i in range(days)
+    ]
+
+
+@pytest.mark.usefixtures("memory_db")
+class WeatherStorageTestCase(unittest.TestCase):
+    """Shared in-memory database holding one city."""
+
+    def setUp(self):
+        country = Country(name="Testland", timezone="UTC")
+        self.city = City(name="Testville", latitude=1.5, longitude=2.5, timezone="UTC", country=country)
+        self.session.add(self.city)
+        self.session.commit()
+        self.service = WeatherApiService(self.session)
+
+    def tearDown(self):
+        self.service.http_session.close()
+
+    def summaries(self):
+        return {
+            (row.year, row.month): row
+            for row in self.session.scalars(
+                select(MonthlyWeatherSummary).where(MonthlyWeatherSummary.city_id == self.city.id)
+            )
+        }
+
+
+class TestStoreWeatherData(WeatherStorageTestCase):
+
+    def test_summaries_across_month_and_year_boundaries(self):
+        """Test storing days from December into January refreshes both months' summaries."""
+        self.service._store_weather_data(daily_rows(self.city.id, date(2020, 12, 30), 4), self.city.id)
+
+        summaries = self.summaries()
+        self.assertEqual(set(summaries), {(2020, 12), (2021, 1)})
+        self.assertEqual(summaries[(2020, 12)].days, 2)
+        self.assertEqual(summaries[(2021, 1)].days, 2)
+        self.assertAlmostEqual(summaries[(2021, 1)].precipitation, 2.0)
+
+    def test_summary_covers_whole_month(self):
+        """Test a month's summary includes days stored earlier, not only the new rows."""
+        self.service._store_weather_data(daily_rows(self.city.id, date(2021, 3, 1), 10), self.city.id)
+        self.service._store_weather_data(daily_rows(self.city.id, date(2021, 3, 11), 5, mean_temp=11.0), self.city.id)
+
+        summary = self.summaries()[(2021, 3)]
+        self.assertEqual(summary.days, 15)
+        self.assertEqual(summary.mean_temp_days, 15)
+        self.assertAlmostEqual(summary.mean_temp_total, 10 * 5.0 + 5 * 11.0)
+
+    def test_stored_days_are_not_duplicated(self):
+        """Test storing a period again adds only the days that were missing."""
+        self.service._store_weather_data(daily_rows(self.city.id, date(2021, 5, 1), 3), self.city.id)
+        self.service._store_weather_data(daily_rows(self.city.id, date(2021, 5, 1), 5), self.city.id)
+
+        stored = self.session.scalar(
+            select(func.count()).select_from(DailyWeatherEntry).where(DailyWeatherEntry.city_id == self.city.id)
+        )
+        self.assertEqual(stored, 5)
+        self.assertEqual(self.summaries()[(2021, 5)].days, 5)
+
+
+class TestHasWeatherForPeriod(WeatherStorageTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service._store_weather_data(daily_rows(self.city.id, date(2021, 1, 1), 10), self.city.id)
+
+    def test_complete_period(self):
+        """Test a period with every day stored is reported as stored."""
+        self.assertTrue(SQLiteQuery(self.session).has_weather_for_period(self.city.id, "2021-01-01", "2021-01-10"))
+
+    def test_period_with_missing_days(self):
+        """Test a period running past the stored days is reported as missing."""
+        self.assertFalse(SQLiteQuery(self.session).has_weather_for_period(self.city.id, "2021-01-01", "2021-01-11"))
+
+
+@pytest.mark.usefixtures("memory_db")
+class TestLocationAliases(unittest.TestCase):
+
+    def setUp(self):
+        self.managers = []
+
+    def tearDown(self):
+        for manager in self.managers:
+            manager.close()
+
+    def new_manager(self):
+        manager = LocationManager(self.session_manager, GeocodingApiService(self.session_manager))
+        self.managers.append(manager)
+        return manager
+
+    def test_alias_resolves_without_geocoding(self):
+        """Test a name that geocoded to a differently named city is resolved from location_aliases later."""
+        london = {"name": "London", "latitude": 51.5, "longitude": -0.12, "country": "United Kingdom", "timezone": "GMT"}
+        manager = self.new_manager()
+        with patch.object(manager.geocoding_service, "search_city", return_value=[london]):
+            city = manager.ensure_location_in_database(" Londres ")
+
+        self.assertEqual(self.session.get(LocationAlias, "londres").city_id, city.id)
+
+        # A new manager has empty caches, so only the alias can avoid the API call
+        manager = self.new_manager()
+        with patch.object(manager.geocoding_service, "search_city") as search_city:
+            self.assertEqual(manager.ensure_location_in_database("LONDRES").id, city.id)
+        search_city.assert_not_called()
+
+    def test_unknown_location(self):
+        """Test a name the Geocoding API has no results for resolves to None."""
+        manager = self.new_manager()
+        with patch.object(manager.geocoding_service, "search_city", side_effect=ValueError("No results")):
+            self.assertIsNone(manager.ensure_location_in_database("Qwxzzy"))
+
+
+class TestInitialiseDbUpgrade(unittest.TestCase):
+
+    def test_upgrade_with_expression_indexes_in_place(self):
+        """Test an older schema that already has the expression indexes is brought up to date."""
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, 'weather.db')
+            engine = create_engine(f"sqlite:///{db_path}")
+            initialise_db(db_path, engine)
+            with engine.begin() as connection:
+                connection.exec_driver_sql("INSERT INTO countries (id, name, timezone) VALUES (1, 'Testland', 'UTC')")
+                connection.exec_driver_sql(
+                    "INSERT INTO cities (id, name, latitude, longitude, timezone, country_id) "
+                    "VALUES (1, 'Testville', 1.5, 2.5, 'UTC', 1)"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO daily_weather_entries (date, min_temp, max_temp, mean_temp, precipitation, city_id) "
+                    "VALUES ('2021-01-01', 1, 3, 2, 0.5, 1)"
+                )
+                connection.exec_driver_sql("DROP INDEX ix_daily_city_date")
+                connection.exec_driver_sql("PRAGMA user_version = 1")
+
+            initialise_db(db_path, engine)
+
+            with engine.connect() as connection:
+                version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+                indexes = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars().all()
+                summaries = connection.exec_driver_sql("SELECT count(*) FROM monthly_weather_summaries").scalar()
+            engine.dispose()
+
+        self.assertEqual(version, SCHEMA_VERSION)
+        self.assertIn("ix_daily_city_date", indexes)
+        self.assertIn("ux_country_name_lower", indexes)
+        self.assertEqual(summaries, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()